@@ -10,7 +10,10 @@ import numpy as np
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from frontend.ui import setup_page_config, apply_custom_css, create_sidebar, show_header
 from backend.authentifat import check_authentication, show_login_form
-from backend.datacleaning import clean_data, load_file
+from backend.datacleaning import DataLoadError, clean_data, load_file
+from backend.ingestion import list_excel_sheets
+from backend.recipe import apply_recipe, get_recipe, recipe_from_json, recipe_to_json
+from backend.sampling import ReservoirSampler
 from utilisation.recommendation import generate_recommendations
 from utilisation.exportpdf import create_pdf_report
 from visualisation import create_visualizations
@@ -64,24 +67,70 @@ def show_import_page():
    
     # Upload de fichier
     uploaded_file = st.file_uploader(
-        "Choisissez un fichier CSV ou Excel",
-        type=['csv', 'xlsx', 'xls'],
-        help="Formats supportés: CSV, Excel (.xlsx, .xls)"
+        "Choisissez un fichier CSV, Excel, Parquet ou Arrow",
+        type=['csv', 'xlsx', 'xls', 'parquet', 'feather', 'arrow', 'ipc', 'gz', 'zst', 'zip'],
+        help="Formats supportés: CSV, Excel (.xlsx, .xls), Parquet, Feather, Arrow IPC (.arrow, .ipc), "
+             "éventuellement compressés (.gz, .zst, .zip)"
     )
    
     if uploaded_file is not None:
         try:
-            # Chargement des données
-            with st.spinner("Chargement du fichier..."):
-                raw_data = load_file(uploaded_file)
-           
+            # Chargement des données (une seule fois par fichier : Streamlit relance
+            # le script à chaque interaction et les gros fichiers coûtent cher à relire)
+            file_key = (uploaded_file.name, uploaded_file.size, getattr(uploaded_file, 'file_id', None))
+
+            # Choix des feuilles pour les classeurs Excel (liste lue sans charger les cellules)
+            sheet_names = None
+            if uploaded_file.name.endswith(('.xlsx', '.xls')):
+                if st.session_state.get('sheets_file_key') != file_key:
+                    st.session_state.available_sheets = list_excel_sheets(uploaded_file)
+                    st.session_state.sheets_file_key = file_key
+                available_sheets = st.session_state.available_sheets
+                sheet_names = st.multiselect(
+                    "Feuilles à importer :",
+                    available_sheets,
+                    default=available_sheets[:1],
+                    help="Plusieurs feuilles sont empilées, avec une colonne indiquant leur origine."
+                )
+                if not sheet_names:
+                    st.info("📄 Sélectionnez au moins une feuille à importer")
+                    return
+                file_key = file_key + (tuple(sheet_names),)
+
+            if st.session_state.get('loaded_file_key') == file_key and st.session_state.data is not None:
+                raw_data = st.session_state.data
+            else:
+                with st.spinner("Chargement du fichier..."):
+                    progress_bar = st.progress(0.0, text="Lecture du fichier...")
+
+                    def report_progress(fraction, rows_read):
+                        progress_bar.progress(fraction, text=f"Lecture du fichier... {rows_read:,} lignes chargées")
+
+                    # Un échantillon représentatif est tiré pendant la lecture, pour l'aperçu
+                    sampler = ReservoirSampler()
+                    try:
+                        raw_data = load_file(uploaded_file, progress_callback=report_progress,
+                                             sheet_names=sheet_names, sampler=sampler)
+                    except DataLoadError as e:
+                        st.error(f"❌ {e}")
+                        raw_data = None
+                    progress_bar.empty()
+                st.session_state.loaded_file_key = file_key if raw_data is not None else None
+                st.session_state.data_sample = sampler.sample if raw_data is not None else None
+
             if raw_data is not None:
                 st.session_state.data = raw_data
                 st.session_state.file_uploaded = True
                 st.success(f"✅ Fichier chargé avec succès! ({raw_data.shape[0]} lignes, {raw_data.shape[1]} colonnes)")
                 
                 st.markdown("### Aperçu des données brutes")
-                st.dataframe(raw_data.head(), use_container_width=True)
+                data_sample = st.session_state.get('data_sample')
+                if data_sample is not None and len(data_sample) < len(raw_data):
+                    st.caption(f"📉 Aperçu tiré d'un échantillon aléatoire de {len(data_sample):,} lignes "
+                               f"sur {len(raw_data):,} ({len(data_sample) / len(raw_data):.1%}).")
+                    st.dataframe(data_sample.head(), use_container_width=True)
+                else:
+                    st.dataframe(raw_data.head(), use_container_width=True)
 
                 st.divider()
 
@@ -103,18 +152,60 @@ def show_import_page():
                             index=0,
                             help="Flag: marque sans modifier. Cap: plafonne à la limite. Remove: supprime la ligne. None: ne fait rien."
                         )
+                    dedup_subset = st.multiselect(
+                        "Colonnes identifiant un doublon :",
+                        raw_data.columns.tolist(),
+                        help="Laisser vide pour comparer les lignes entières. Sinon, deux lignes identiques "
+                             "sur ces colonnes sont des doublons (la première est conservée)."
+                    )
+                    optimize = st.checkbox(
+                        "Optimiser la mémoire",
+                        value=False,
+                        help="Réduit les types numériques et encode les textes (catégories, chaînes Arrow). "
+                             "Les valeurs ne changent pas."
+                    )
+                    profile = st.checkbox(
+                        "Profiler le nettoyage",
+                        value=False,
+                        help="Mesure la durée, le temps CPU, le pic mémoire et les dimensions des données "
+                             "à chaque étape. Ralentit légèrement le nettoyage."
+                    )
+                    recipe_file = st.file_uploader(
+                        "Rejouer une recette de nettoyage (JSON) :",
+                        type=['json'],
+                        help="Recette téléchargée après un nettoyage précédent : types, colonnes, bornes et "
+                             "valeurs de remplacement sont repris tels quels, sans être recalculés. "
+                             "Les options ci-dessus sont alors ignorées."
+                    )
 
                 # --- Bouton pour lancer le nettoyage ---
                 if st.button(" Lancer le Nettoyage des Données", use_container_width=True, type="primary"):
                     with st.spinner("Nettoyage des données en cours..."):
-                        cleaned_df, log_messages = clean_data(
-                            st.session_state.data,
-                            missing_value_strategy=missing_strategy,
-                            outlier_strategy=outlier_strategy
-                        )
+                        if recipe_file is not None:
+                            try:
+                                cleaned_df, log_messages = apply_recipe(
+                                    st.session_state.data, recipe_from_json(recipe_file.getvalue().decode('utf-8')))
+                            except ValueError as e:
+                                st.error(f"❌ {e}")
+                                return
+                            stage_profile = []
+                        else:
+                            cleaned_df, log_messages, *stage_profile = clean_data(
+                                st.session_state.data,
+                                missing_value_strategy=missing_strategy,
+                                outlier_strategy=outlier_strategy,
+                                dedup_subset=dedup_subset,
+                                optimize_memory=optimize,
+                                # Tous les cœurs pour les jeux larges ; les petits restent en série
+                                n_jobs=-1,
+                                # Les données brutes restent en session : les colonnes inchangées sont partagées
+                                copy_on_write=True,
+                                profile=profile
+                            )
                         
                         st.session_state.cleaned_data = cleaned_df
                         st.session_state.cleaning_log = log_messages
+                        st.session_state.cleaning_profile = stage_profile[0] if stage_profile else None
                     
                     st.success(" Nettoyage terminé !")
 
@@ -131,6 +222,26 @@ def show_import_page():
                                 st.success(msg)
                             else:
                                 st.info(msg)
+
+                        if st.session_state.cleaning_profile is not None:
+                            with st.expander("⏱️ Profil des étapes de nettoyage"):
+                                stage_profile = st.session_state.cleaning_profile
+                                slowest = stage_profile.loc[stage_profile['duree_s'].idxmax()] if not stage_profile.empty else None
+                                if slowest is not None:
+                                    st.caption(f"Étape la plus longue : {slowest['etape']} ({slowest['duree_s']:.2f} s). "
+                                               "Durées mesurées avec le suivi mémoire actif.")
+                                st.dataframe(stage_profile, use_container_width=True, hide_index=True)
+
+                        recipe = get_recipe(st.session_state.cleaned_data)
+                        if recipe is not None:
+                            st.download_button(
+                                label="📋 Télécharger la recette de nettoyage (JSON)",
+                                data=recipe_to_json(recipe).encode('utf-8'),
+                                file_name="recette_nettoyage.json",
+                                mime="application/json",
+                                help="À rejouer sur les prochains fichiers de même structure.",
+                                use_container_width=True
+                            )
                 
                        
         except Exception as e:
@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+
+# Nombre maximal de classes d'un histogramme (la largeur est élargie au besoin)
+MAX_HISTOGRAM_BINS = 500
+# Nombre maximal de points aberrants transmis au graphique d'une boîte à moustaches
+MAX_OUTLIER_POINTS = 2000
+# Nuages de points : tracé WebGL (Scattergl) au-delà du premier seuil, carte de
+# densité 2D calculée ici au-delà du second
+SCATTERGL_MIN_POINTS = 5_000
+DENSITY_MIN_POINTS = 200_000
+# Nombre de cases de la carte de densité sur chaque axe
+DENSITY_GRID_SIZE = 150
+# Agrégats temporels, du plus fin au plus large (fréquences de `pd.Period`)
+ROLLUP_PERIODS = {'jour': 'D', 'semaine': 'W', 'mois': 'M', 'trimestre': 'Q'}
+# Nombre maximal de points d'une courbe temporelle : la granularité la plus fine qui le respecte est retenue
+MAX_TIME_POINTS = 400
+
+
+def finite_values(series):
+    """Valeurs finies d'une colonne numérique (nuls et infinis retirés), en float64."""
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return values[np.isfinite(values)]
+
+
+def freedman_diaconis_width(values):
+    """
+    Largeur de classe de Freedman–Diaconis, 2·IQR / n^(1/3), robuste aux valeurs
+    extrêmes. Si l'écart interquartile est nul, repli sur la règle de Sturges.
+    """
+    q1, q3 = np.quantile(values, [0.25, 0.75])
+    width = 2 * (q3 - q1) / len(values) ** (1 / 3)
+    if width > 0:
+        return width
+    return (values.max() - values.min()) / (np.log2(len(values)) + 1)
+
+
+def histogram_bins(values, bin_width=None):
+    """
+    Histogramme calculé côté serveur : `(effectifs, bornes, élargie)`, les deux
+    premiers comme `np.histogram`. La largeur vaut `bin_width` si elle est fournie,
+    sinon celle de Freedman–Diaconis ; elle est élargie (troisième élément à True)
+    si elle donnerait plus de `MAX_HISTOGRAM_BINS` classes.
+    """
+    if len(values) == 0:
+        return np.array([], dtype=np.int64), np.array([0.0, 1.0]), False
+    low, high = values.min(), values.max()
+    if low == high:
+        return np.array([len(values)]), np.array([low - 0.5, high + 0.5]), False
+    width = bin_width if bin_width else freedman_diaconis_width(values)
+    # Classes de largeur exacte à partir du minimum ; la dernière peut déborder du maximum
+    bins = int(max(np.ceil((high - low) / width), 1))
+    widened = bins > MAX_HISTOGRAM_BINS
+    if widened:
+        bins = MAX_HISTOGRAM_BINS
+        width = (high - low) / bins
+    edges = low + width * np.arange(bins + 1)
+    # Le maximum tombe dans la dernière classe même si l'arrondi la place juste avant
+    edges[-1] = max(edges[-1], high)
+    counts, edges = np.histogram(values, bins=edges)
+    return counts, edges, widened
+
+
+def box_summary(values, whisker=1.5):
+    """
+    Statistiques d'une boîte à moustaches : quartiles, moyenne, moustaches (valeurs
+    extrêmes à moins de `whisker` IQR des quartiles, comme Plotly) et points
+    aberrants. Au-delà de `MAX_OUTLIER_POINTS`, les points transmis sont pris à
+    intervalles réguliers parmi les aberrants triés ; 'n_outliers' garde leur nombre exact.
+    """
+    if len(values) == 0:
+        return None
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - whisker * iqr) & (values <= q3 + whisker * iqr)]
+    outliers = np.sort(values[(values < q1 - whisker * iqr) | (values > q3 + whisker * iqr)])
+    n_outliers = len(outliers)
+    if n_outliers > MAX_OUTLIER_POINTS:
+        outliers = outliers[np.linspace(0, n_outliers - 1, MAX_OUTLIER_POINTS).astype(np.int64)]
+    return {
+        'q1': q1, 'median': median, 'q3': q3, 'mean': values.mean(),
+        'lowerfence': inside.min(), 'upperfence': inside.max(),
+        'outliers': outliers, 'n_outliers': n_outliers,
+    }
+
+
+def paired_finite_values(x, y):
+    """Valeurs de deux colonnes numériques sur les lignes où les deux sont finies, et le masque de ces lignes."""
+    x = x.to_numpy(dtype=np.float64, na_value=np.nan)
+    y = y.to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = np.isfinite(x) & np.isfinite(y)
+    return x[valid], y[valid], valid
+
+
+def scatter_mode(n_points):
+    """Rendu d'un nuage de `n_points` points : 'svg', 'webgl' ou 'density'."""
+    if n_points > DENSITY_MIN_POINTS:
+        return 'density'
+    if n_points > SCATTERGL_MIN_POINTS:
+        return 'webgl'
+    return 'svg'
+
+
+def linear_fit(x, y):
+    """
+    Droite des moindres carrés y = pente·x + ordonnée, en forme fermée (une passe
+    sur les données), avec son R². None s'il y a moins de deux points ou si x est constant.
+    """
+    if len(x) < 2:
+        return None
+    dx, dy = x - x.mean(), y - y.mean()
+    sxx, sxy, syy = dx @ dx, dx @ dy, dy @ dy
+    if sxx == 0:
+        return None
+    slope = sxy / sxx
+    return {'slope': slope, 'intercept': y.mean() - slope * x.mean(),
+            'r2': sxy ** 2 / (sxx * syy) if syy > 0 else 1.0}
+
+
+def density_grid(x, y, bins=DENSITY_GRID_SIZE):
+    """
+    Nombre de points par case d'une grille `bins` × `bins` couvrant le nuage :
+    `(effectifs, centres en x, centres en y)`, les effectifs indexés [y, x] comme
+    une image. La taille du résultat ne dépend pas du nombre de points.
+    """
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    return counts.T, (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2
+
+
+def _complete_periods(rollup, period):
+    """Agrégat réindexé sur toutes les périodes de son étendue, les périodes sans ligne à zéro (comme `resample`)."""
+    starts = pd.period_range(rollup.index.min(), rollup.index.max(), freq=period).start_time
+    return rollup.reindex(starts, fill_value=0)
+
+
+def time_rollups(dates, values):
+    """
+    Somme de `values` et nombre de lignes par jour, semaine (du lundi), mois et
+    trimestre, indexés par le début de chaque période : `{nom: DataFrame}` avec
+    les colonnes 'somme' et 'lignes'. Les lignes sans date sont ignorées.
+
+    Seul l'agrégat journalier parcourt les données ; les autres regroupent
+    ses quelques milliers de jours. Un dictionnaire vide si aucune date n'est valide.
+    """
+    if isinstance(dates.dtype, pd.DatetimeTZDtype):
+        # Heure locale du fuseau : un jour commence à minuit sur place
+        dates = dates.dt.tz_localize(None)
+    valid = dates.notna().to_numpy()
+    if not valid.any():
+        return {}
+    days = dates[valid].dt.floor('D').to_numpy()
+    amounts = pd.Series(values[valid].to_numpy(dtype=np.float64, na_value=np.nan)).groupby(days)
+    daily = pd.DataFrame({'somme': amounts.sum(), 'lignes': amounts.size()})
+    rollups = {'jour': _complete_periods(daily, 'D')}
+    for name, period in list(ROLLUP_PERIODS.items())[1:]:
+        starts = daily.index.to_period(period).start_time
+        rollups[name] = _complete_periods(daily.groupby(starts).sum(), period)
+    return rollups
+
+
+def auto_granularity(rollups):
+    """Granularité la plus fine dont la courbe compte au plus `MAX_TIME_POINTS` points, sinon la plus large."""
+    for name in ROLLUP_PERIODS:
+        if len(rollups[name]) <= MAX_TIME_POINTS:
+            return name
+    return list(ROLLUP_PERIODS)[-1]
+
+
+def half_trend(daily):
+    """
+    Sommes de la première et de la seconde moitié des lignes, dans l'ordre
+    chronologique, lues sur l'agrégat journalier : un jour appartient à la
+    première moitié si elle contient toutes ses lignes.
+    """
+    cumulative = daily['lignes'].cumsum()
+    first = (cumulative <= cumulative.iloc[-1] // 2).to_numpy()
+    return daily['somme'][first].sum(), daily['somme'][~first].sum()
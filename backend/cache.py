@@ -0,0 +1,129 @@
+import hashlib
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Résultats dérivés attachés à chaque DataFrame, par identité d'objet
+# (les DataFrames chargés ou nettoyés ne sont pas modifiés en place)
+_dataset_stores = {}
+_dataset_stores_lock = threading.Lock()
+
+
+def _forget_dataset(object_id):
+    with _dataset_stores_lock:
+        _dataset_stores.pop(object_id, None)
+
+
+def dataset_store(df):
+    """
+    Dictionnaire propre à un DataFrame, où les consommateurs (vue d'ensemble,
+    recommandations, rapport PDF...) rangent ce qu'ils ont déjà calculé sur lui.
+    Il est libéré avec le DataFrame ; celui-ci ne doit pas être modifié en place.
+    """
+    object_id = id(df)
+    with _dataset_stores_lock:
+        known = _dataset_stores.get(object_id)
+        if known is not None and known[0]() is df:
+            return known[1]
+        store = {}
+        _dataset_stores[object_id] = (weakref.ref(df), store)
+    weakref.finalize(df, _forget_dataset, object_id)
+    return store
+
+
+def fingerprint_frame(df):
+    """
+    Empreinte du contenu d'un DataFrame : hash 64 bits de chaque ligne
+    (`hash_pandas_object`), condensé avec les noms et types des colonnes.
+
+    Le résultat est mémorisé avec le DataFrame (voir `dataset_store`) : celui-ci
+    ne doit donc pas être modifié en place après avoir servi de clé de cache.
+    """
+    store = dataset_store(df)
+    if 'fingerprint' in store:
+        return store['fingerprint']
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([str(col) for col in df.columns]).encode())
+    digest.update(repr([str(dtype) for dtype in df.dtypes]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    store['fingerprint'] = digest.hexdigest()
+    return store['fingerprint']
+
+
+def estimate_nbytes(value):
+    """Estimation de l'empreinte mémoire d'une valeur mise en cache."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, 'to_plotly_json'):
+        # Figure Plotly : ses données et sa mise en page
+        return estimate_nbytes(value.to_plotly_json())
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(item) for item in value.values())
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    Cache LRU borné par un budget mémoire (en octets), partagé entre les sessions
+    Streamlit. Les entrées les moins récemment utilisées sont évincées dès que
+    le budget est dépassé ; une entrée plus grande que le budget n'est pas gardée.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value, nbytes=None):
+        if nbytes is None:
+            nbytes = estimate_nbytes(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+
+    def set_budget(self, max_bytes):
+        """Modifie le budget mémoire, en évinçant immédiatement si nécessaire."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._entries and self.current_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
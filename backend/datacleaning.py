@@ -1,177 +1,480 @@
+import contextlib
+import os
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-import streamlit as st
+from backend.cache import LRUCache, fingerprint_frame
+from backend.dedup import duplicate_mask
+from backend.ingestion import (ARROW_EXTENSIONS, CHUNKED_READ_THRESHOLD, CSV_CHUNK_ROWS, DecompressedSource,
+                               get_file_size, load_arrow, load_csv, load_excel, open_compressed)
+from backend.imputation import compute_imputation_values, impute_missing_values
+from backend.optimization import optimize_memory
+from backend.outliers import apply_outlier_strategy, compute_iqr_bounds
+from backend.parallel import map_blocks, resolve_n_jobs, should_parallelize
+from backend.profiling import StageRecorder
+from backend.typeinference import DATETIME_FORMATS_ATTR, infer_column, take_codes
+
+# Budget mémoire du cache des étapes de nettoyage (en Mo, configurable par variable d'environnement)
+CLEANING_CACHE_MB = int(os.environ.get('SMARTDATA_CLEANING_CACHE_MB', '512'))
+_stage_cache = LRUCache(CLEANING_CACHE_MB * 1024 * 1024)
+
+class DataLoadError(Exception):
+    """Fichier impossible à charger (format non supporté, contenu illisible...) ; le message est destiné à l'utilisateur."""
 
 # La fonction de chargement reste utile et bien conçue.
-def load_file(uploaded_file):
-    """Chargement d'un fichier CSV ou Excel avec gestion des encodages."""
-    try:
-        if uploaded_file.name.endswith('.csv'):
+def load_file(uploaded_file, chunksize=None, progress_callback=None, sheet_names=None, sampler=None):
+    """
+    Chargement d'un fichier CSV, Excel, Parquet, Feather ou Arrow avec gestion des encodages.
+    `uploaded_file` est un fichier importé dans Streamlit, un fichier ouvert en
+    binaire ou un chemin. Lève `DataLoadError` si le fichier ne peut être chargé.
+
+    Pour les CSV, encodage, séparateur, décimale et types sont détectés sur un
+    échantillon (voir `sniff_csv`) avant une lecture unique et typée. Les CSV
+    plus gros que `CHUNKED_READ_THRESHOLD` (ou si `chunksize` est fourni) sont
+    lus en streaming, bloc par bloc, avec des types compacts.
+    `progress_callback(fraction, lignes_lues)` permet de suivre la progression.
+    Pour Excel, `sheet_names` liste les feuilles à importer (la première par défaut).
+    Les formats colonnaires sont lus sans analyse ni copie (voir `load_arrow`).
+    Les fichiers compressés (.gz, .zst, .zip) sont reconnus à leur signature.
+    `sampler` (un `ReservoirSampler`) reçoit un échantillon des lignes pendant
+    la lecture, pour l'aperçu et l'exploration des gros fichiers.
+    """
+    if isinstance(uploaded_file, (str, os.PathLike)):
+        if os.fspath(uploaded_file).endswith(ARROW_EXTENSIONS):
+            # Chemin Arrow : projeté en mémoire par `load_arrow` plutôt que lu en entier
             try:
-                # Laisser pandas inférer l'encodage est souvent plus robuste
-                df = pd.read_csv(uploaded_file, encoding_errors='replace')
-            except Exception:
-                # Fallback sur les encodages communs si l'inférence échoue
-                uploaded_file.seek(0)
-                df = pd.read_csv(uploaded_file, encoding='latin-1')
-        elif uploaded_file.name.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(uploaded_file)
+                df = load_arrow(uploaded_file)
+            except Exception as e:
+                raise DataLoadError(f"Erreur lors du chargement du fichier : {e}") from e
+            if sampler is not None:
+                sampler.add(df)
+            return df
+        try:
+            raw = open(uploaded_file, 'rb')
+        except OSError as e:
+            raise DataLoadError(f"Fichier illisible : {e}") from e
+        with raw:
+            return load_file(raw, chunksize, progress_callback, sheet_names, sampler)
+    try:
+        # Les fichiers .gz, .zst et .zip sont détectés par leur signature et décompressés à la volée
+        source = open_compressed(uploaded_file)
+        if source.name.endswith('.csv'):
+            # Un CSV compressé est presque toujours volumineux une fois décompressé : lecture par blocs
+            if chunksize is None and (isinstance(source, DecompressedSource)
+                                      or get_file_size(source) > CHUNKED_READ_THRESHOLD):
+                chunksize = CSV_CHUNK_ROWS
+            # Encodage, séparateurs et types sont détectés sur un échantillon,
+            # puis le fichier est lu une seule fois avec des types explicites
+            df = load_csv(source, chunksize=chunksize, progress_callback=progress_callback, sampler=sampler)
+        elif source.name.endswith(('.xlsx', '.xls')):
+            df = load_excel(source, sheet_names=sheet_names)
+        elif source.name.endswith(ARROW_EXTENSIONS):
+            df = load_arrow(source)
         else:
-            st.error("Format de fichier non supporté. Veuillez utiliser CSV ou Excel.")
-            return None
+            raise DataLoadError("Format de fichier non supporté. Veuillez utiliser CSV, Excel, Parquet, Feather ou Arrow.")
+        # Les lectures en une passe alimentent l'échantillon une fois le fichier chargé
+        if sampler is not None and sampler.rows_seen == 0:
+            sampler.add(df)
         return df
+    except DataLoadError:
+        raise
     except Exception as e:
-        st.error(f"Erreur lors du chargement du fichier : {e}")
+        raise DataLoadError(f"Erreur lors du chargement du fichier : {e}") from e
+
+# Libellés des groupes d'étapes dans le rapport mémoire
+PREPARE_STAGES = 'Étapes 1-6'
+OUTLIER_STAGE = '7. Valeurs aberrantes'
+MISSING_STAGE = '8. Valeurs manquantes'
+MEMORY_STAGE = '9. Optimisation mémoire'
+
+# Clé de `DataFrame.attrs` où le nettoyage dépose sa recette (voir `backend.recipe`)
+CLEANING_RECIPE_ATTR = 'cleaning_recipe'
+
+# Variantes textuelles de "valeur manquante" converties en NaN à l'étape 3
+NULL_VARIANTS = ['', 'nan', 'na', 'none', 'null', 'n/a', '--']
+
+def standardize_column_names(columns):
+    """Noms de colonnes en minuscules, espaces remplacés par '_', caractères spéciaux retirés."""
+    return (columns
+            .str.strip()
+            .str.lower()
+            .str.replace(r'\s+', '_', regex=True)
+            .str.replace(r'[^a-z0-9_]', '', regex=True))
+
+def _normalize_text(values):
+    # Trim whitespace, puis standardize nulls
+    return values.str.strip().str.lower().replace(NULL_VARIANTS, np.nan)
+
+def _factorize_text(series):
+    """
+    Codes des lignes et valeurs distinctes nettoyées d'une colonne texte, ou
+    None si ses valeurs ne sont pas hachables (listes...). Les colonnes texte
+    ont en général peu de valeurs distinctes : le nettoyage porte sur celles-ci,
+    et le travail par ligne se réduit au hachage de `factorize`.
+    """
+    try:
+        codes, uniques = pd.factorize(series)
+    except TypeError:
         return None
+    return codes, _normalize_text(pd.Series(uniques))
 
-def clean_data(df, 
-               missing_value_strategy='auto', 
-               missing_col_threshold=0.8, 
-               outlier_strategy='flag',
-               outlier_method='iqr', 
-               iqr_multiplier=1.5):
+def encode_text(series):
     """
-    Pipeline de nettoyage de données unifié, configurable et robuste.
-    Retourne le DataFrame nettoyé et un journal des opérations.
+    Colonne texte nettoyée (espaces, minuscules, variantes de nuls) et encodée
+    en catégorie : les catégories sont les valeurs distinctes nettoyées, que
+    l'inférence de types de l'étape 6 réutilise sans relire chaque ligne.
     """
-    if df is None or df.empty:
-        return pd.DataFrame(), ["Le DataFrame initial est vide."]
+    factorized = _factorize_text(series)
+    if factorized is None:
+        return _normalize_text(series)
+    codes, cleaned = factorized
+    # Des valeurs distinctes peuvent se confondre une fois nettoyées ('A ' et 'a')
+    cleaned_codes, categories = pd.factorize(cleaned)
+    codes = np.append(cleaned_codes, -1)[codes]
+    return pd.Series(pd.Categorical.from_codes(codes, categories), index=series.index, name=series.name)
+
+# Traitements par bloc de colonnes, exécutés tels quels en série ou dans le pool de processus
+def normalize_text_block(block):
+    """Textes nettoyés, dans leur type d'origine (valeurs distinctes nettoyées, puis reconstruites par codes)."""
+    normalized = {}
+    for col in block.columns:
+        factorized = _factorize_text(block[col])
+        if factorized is None:
+            normalized[col] = _normalize_text(block[col])
+        else:
+            codes, cleaned = factorized
+            normalized[col] = take_codes(cleaned, codes, block[col])
+    return normalized
+
+def _encode_text_block(block):
+    return {col: encode_text(block[col]) for col in block.columns}
+
+def _infer_types_block(block):
+    results = []
+    for col in block.columns:
+        converted_series, kind, date_format = infer_column(block[col])
+        changed = kind is not None and converted_series.dtype != block[col].dtype
+        results.append((col, converted_series if changed else None, kind, date_format))
+    return results
 
-    # Copie pour éviter de modifier l'original et initialisation du journal
-    cleaned_df = df.copy()
+def _iqr_bounds_block(block, iqr_multiplier):
+    return compute_iqr_bounds(block, block.columns, iqr_multiplier)
+
+def _imputation_values_block(block):
+    return compute_imputation_values(block, block.columns)
+
+def recipe_value(value):
+    """Valeur convertie en type JSON : scalaires NumPy en Python, dates en ISO 8601, manquants en None."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return value.isoformat()
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value
+
+def _record_recipe(df, **parts):
+    """Ajoute des éléments à la recette de nettoyage portée par `df.attrs`."""
+    df.attrs[CLEANING_RECIPE_ATTR] = {**df.attrs.get(CLEANING_RECIPE_ATTR, {}), **parts}
+
+def _map_columns(func, df, columns, pool, n_jobs, *args):
+    """
+    Applique `func` à `df[columns]` et renvoie la liste des résultats par bloc,
+    dans l'ordre des colonnes : un seul bloc en série, plusieurs blocs répartis
+    sur le pool de processus quand le jeu de données est assez large.
+    """
+    if should_parallelize(df, columns, pool):
+        return map_blocks(pool, n_jobs, func, df, columns, *args)
+    return [func(df[list(columns)], *args)]
+
+def _prepare_data(df, missing_col_threshold, dedup_subset=None, pool=None, n_jobs=1, recorder=None):
+    """Étapes 1 à 6 : ne dépendent que des données et du seuil de colonnes vides."""
+    recorder = recorder or StageRecorder()
+    # Copie pour éviter de modifier l'original et initialisation du journal.
+    # En mode copy-on-write, la copie est paresseuse : seules les colonnes
+    # réellement transformées seront matérialisées, les autres restent partagées.
+    cleaned_df = df.copy(deep=not pd.get_option('mode.copy_on_write'))
     cleaning_log = []
+    # Chaque étape note ses décisions dans la recette, rejouable par `backend.recipe.apply_recipe`
+    recipe = {'columns': df.columns.tolist()}
 
     # --- 1. Nettoyage Structurel de Base ---
-    initial_shape = cleaned_df.shape
-    # Suppression des lignes et colonnes entièrement vides
-    cleaned_df.dropna(how='all', inplace=True)
-    cleaned_df.dropna(axis=1, how='all', inplace=True)
-    shape_after_drop_all = cleaned_df.shape
-    if initial_shape != shape_after_drop_all:
-        cleaning_log.append(f"INFO: Suppression des lignes/colonnes entièrement vides. Taille passée de {initial_shape} à {shape_after_drop_all}.")
+    with recorder.stage('1. Structure', cleaned_df) as stage:
+        initial_shape = cleaned_df.shape
+        # Suppression des lignes et colonnes entièrement vides
+        cleaned_df.dropna(how='all', inplace=True)
+        cleaned_df.dropna(axis=1, how='all', inplace=True)
+        shape_after_drop_all = cleaned_df.shape
+        if initial_shape != shape_after_drop_all:
+            cleaning_log.append(f"INFO: Suppression des lignes/colonnes entièrement vides. Taille passée de {initial_shape} à {shape_after_drop_all}.")
+        stage.output(cleaned_df)
 
     # --- 2. Nettoyage des Noms de Colonnes ---
-    original_columns = cleaned_df.columns.tolist()
-    cleaned_df.columns = (cleaned_df.columns
-                          .str.strip()
-                          .str.lower()
-                          .str.replace(r'\s+', '_', regex=True)
-                          .str.replace(r'[^a-z0-9_]', '', regex=True))
-    new_columns = cleaned_df.columns.tolist()
-    renamed_cols = {o: n for o, n in zip(original_columns, new_columns) if o != n}
-    if renamed_cols:
-        cleaning_log.append(f"INFO: {len(renamed_cols)} noms de colonnes ont été standardisés (ex: '{list(renamed_cols.keys())[0]}' -> '{list(renamed_cols.values())[0]}').")
+    with recorder.stage('2. Noms de colonnes', cleaned_df):
+        original_columns = cleaned_df.columns.tolist()
+        cleaned_df.columns = standardize_column_names(cleaned_df.columns)
+        new_columns = cleaned_df.columns.tolist()
+        renamed_cols = {o: n for o, n in zip(original_columns, new_columns) if o != n}
+        recipe['column_names'] = dict(zip(original_columns, new_columns))
+        if renamed_cols:
+            cleaning_log.append(f"INFO: {len(renamed_cols)} noms de colonnes ont été standardisés (ex: '{list(renamed_cols.keys())[0]}' -> '{list(renamed_cols.values())[0]}').")
 
     # --- 3. Nettoyage des Données Textuelles et Standardisation des "Nuls" ---
-    # Convertit les chaînes vides et autres variantes de "null" en véritables NaN
-    text_cols = cleaned_df.select_dtypes(include=['object']).columns
-    null_variants = ['', 'nan', 'na', 'none', 'null', 'n/a', '--']
-    for col in text_cols:
-        # Trim whitespace
-        cleaned_df[col] = cleaned_df[col].str.strip()
-        # Standardize nulls
-        cleaned_df[col] = cleaned_df[col].str.lower().replace(null_variants, np.nan)
-    cleaning_log.append(f"INFO: Nettoyage des espaces et standardisation des valeurs textuelles vides en NaN.")
+    with recorder.stage('3. Textes', cleaned_df):
+        # Convertit les chaînes vides et autres variantes de "null" en véritables NaN
+        # 'string' couvre aussi les chaînes Arrow (fichiers Parquet/Feather)
+        # Les colonnes restent encodées en catégories jusqu'à la fin de l'étape 6
+        text_cols = cleaned_df.select_dtypes(include=['object', 'string']).columns
+        text_dtypes = cleaned_df.dtypes[text_cols].to_dict()
+        recipe['text_columns'] = text_cols.tolist()
+        for normalized in _map_columns(_encode_text_block, cleaned_df, text_cols, pool, n_jobs):
+            for col, values in normalized.items():
+                cleaned_df[col] = values
+        cleaning_log.append(f"INFO: Nettoyage des espaces et standardisation des valeurs textuelles vides en NaN.")
 
     # --- 4. Suppression des Doublons ---
-    initial_rows = len(cleaned_df)
-    cleaned_df.drop_duplicates(inplace=True)
-    duplicates_removed = initial_rows - len(cleaned_df)
-    if duplicates_removed > 0:
-        cleaning_log.append(f"IMPORTANT: {duplicates_removed} ligne(s) en double ont été supprimée(s).")
+    with recorder.stage('4. Doublons', cleaned_df) as stage:
+        # Comparaison par hash des lignes, sur toutes les colonnes ou sur la clé choisie
+        # (noms bruts ou standardisés, ramenés aux noms de l'étape 2)
+        subset = standardize_column_names(pd.Index(dedup_subset)).tolist() if dedup_subset else None
+        recipe['dedup_columns'] = subset
+        duplicates = duplicate_mask(cleaned_df, subset)
+        duplicates_removed = int(duplicates.sum())
+        if duplicates_removed > 0:
+            cleaned_df = cleaned_df[~duplicates]
+            key_text = f" (clé : {', '.join(subset)})" if subset else ""
+            cleaning_log.append(f"IMPORTANT: {duplicates_removed} ligne(s) en double ont été supprimée(s){key_text}.")
+        stage.output(cleaned_df)
 
     # --- 5. Gestion des Colonnes Fortement Vides ---
-    # A faire avant l'imputation
-    missing_ratios = cleaned_df.isnull().sum() / len(cleaned_df)
-    cols_to_drop = missing_ratios[missing_ratios > missing_col_threshold].index
-    if not cols_to_drop.empty:
-        cleaned_df.drop(columns=cols_to_drop, inplace=True)
-        cleaning_log.append(f"AVERTISSEMENT: {len(cols_to_drop)} colonnes ({', '.join(cols_to_drop)}) supprimées car plus de {missing_col_threshold:.0%} de valeurs sont manquantes.")
+    with recorder.stage('5. Colonnes vides', cleaned_df) as stage:
+        # A faire avant l'imputation
+        # count() évite de matérialiser le masque de nuls complet
+        missing_ratios = (len(cleaned_df) - cleaned_df.count()) / len(cleaned_df)
+        cols_to_drop = missing_ratios[missing_ratios > missing_col_threshold].index
+        recipe['dropped_columns'] = cols_to_drop.tolist()
+        if not cols_to_drop.empty:
+            cleaned_df.drop(columns=cols_to_drop, inplace=True)
+            cleaning_log.append(f"AVERTISSEMENT: {len(cols_to_drop)} colonnes ({', '.join(cols_to_drop)}) supprimées car plus de {missing_col_threshold:.0%} de valeurs sont manquantes.")
+        stage.output(cleaned_df)
 
     # --- 6. Inférence et Conversion des Types ---
-    original_types = cleaned_df.dtypes.to_dict()
-    # Tente de convertir en numérique, puis date, puis booléen.
-    for col in cleaned_df.columns:
-        # Tente la conversion numérique
-        converted_series = pd.to_numeric(cleaned_df[col], errors='coerce')
-        if converted_series.notna().sum() > 0.8 * cleaned_df[col].notna().sum(): # Si >80% de succès
-            # Tente de convertir en entier si possible pour économiser la mémoire
-            if converted_series.dropna().apply(lambda x: x == int(x)).all():
-                cleaned_df[col] = converted_series.astype('Int64')
-            else:
-                cleaned_df[col] = converted_series
-            continue # Passe à la colonne suivante
-
-        # Tente la conversion en date
-        try:
-            converted_series = pd.to_datetime(cleaned_df[col], errors='coerce')
-            if converted_series.notna().sum() > 0.8 * cleaned_df[col].notna().sum():
-                cleaned_df[col] = converted_series
-                continue
-        except Exception:
-            pass
-            
-        # Tente la conversion en booléen
-        if cleaned_df[col].nunique() <= 2:
-             bool_map = {'true': True, '1': True, 'yes': True, 'oui': True,
-                         'false': False, '0': False, 'no': False, 'non': False}
-             if cleaned_df[col].dropna().str.lower().isin(bool_map.keys()).all():
-                 cleaned_df[col] = cleaned_df[col].str.lower().map(bool_map).astype('boolean')
-
-    new_types = cleaned_df.dtypes.to_dict()
-    types_changed = {k: f"{original_types[k]} -> {new_types[k]}" for k in new_types if str(original_types.get(k)) != str(new_types[k])}
-    if types_changed:
-        cleaning_log.append(f"INFO: {len(types_changed)} types de colonnes ont été convertis (ex: '{list(types_changed.keys())[0]}' de {list(types_changed.values())[0]}).")
+    with recorder.stage('6. Types', cleaned_df):
+        original_types = {**cleaned_df.dtypes.to_dict(), **text_dtypes}
+        # Numérique, puis date, puis booléen : le type est décidé sur un échantillon,
+        # confirmé sur la colonne complète, et les colonnes déjà typées ne sont que réduites
+        datetime_formats = {}
+        recipe['types'] = {}
+        for results in _map_columns(_infer_types_block, cleaned_df, cleaned_df.columns, pool, n_jobs):
+            for col, converted_series, kind, date_format in results:
+                if converted_series is not None:
+                    cleaned_df[col] = converted_series
+                    recipe['types'][col] = {'kind': kind, 'dtype': str(converted_series.dtype), 'date_format': date_format}
+                if date_format is not None:
+                    datetime_formats[col] = date_format
+        # Textes restés textes : retour à leur type d'origine (une indexation par les codes)
+        for col, text_dtype in text_dtypes.items():
+            if col in cleaned_df.columns and isinstance(cleaned_df[col].dtype, pd.CategoricalDtype):
+                cleaned_df[col] = cleaned_df[col].astype(text_dtype)
+        # Les formats de date détectés voyagent avec le jeu de données (réutilisés par le dashboard KPI)
+        cleaned_df.attrs[DATETIME_FORMATS_ATTR] = datetime_formats
 
+        new_types = cleaned_df.dtypes.to_dict()
+        types_changed = {k: f"{original_types[k]} -> {new_types[k]}" for k in new_types if str(original_types.get(k)) != str(new_types[k])}
+        if types_changed:
+            cleaning_log.append(f"INFO: {len(types_changed)} types de colonnes ont été convertis (ex: '{list(types_changed.keys())[0]}' de {list(types_changed.values())[0]}).")
+
+    # Remplace une éventuelle recette héritée des données d'entrée
+    cleaned_df.attrs[CLEANING_RECIPE_ATTR] = recipe
+    return cleaned_df, cleaning_log
+
+def _handle_outliers(cleaned_df, outlier_strategy, outlier_method, iqr_multiplier, pool=None, n_jobs=1, recorder=None):
+    """Étape 7 : valeurs aberrantes."""
+    recorder = recorder or StageRecorder()
+    cleaning_log = []
     # --- 7. Gestion des Valeurs Aberrantes (Outliers) ---
-    numeric_cols_for_outliers = cleaned_df.select_dtypes(include=np.number).columns
-    if outlier_strategy != 'none' and outlier_method == 'iqr':
-        for column in numeric_cols_for_outliers:
-            Q1 = cleaned_df[column].quantile(0.25)
-            Q3 = cleaned_df[column].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - iqr_multiplier * IQR
-            upper_bound = Q3 + iqr_multiplier * IQR
-            
-            outliers = (cleaned_df[column] < lower_bound) | (cleaned_df[column] > upper_bound)
-            
-            if outliers.sum() > 0:
-                if outlier_strategy == 'flag':
-                    cleaned_df[f'{column}_outlier'] = outliers
-                    cleaning_log.append(f"INFO: {outliers.sum()} valeurs aberrantes détectées et signalées dans '{column}'.")
-                elif outlier_strategy == 'remove':
-                    cleaned_df = cleaned_df[~outliers]
-                    cleaning_log.append(f"IMPORTANT: {outliers.sum()} lignes contenant des valeurs aberrantes pour '{column}' ont été supprimées.")
-                elif outlier_strategy == 'cap':
-                    cleaned_df[column] = np.where(cleaned_df[column] < lower_bound, lower_bound, cleaned_df[column])
-                    cleaned_df[column] = np.where(cleaned_df[column] > upper_bound, upper_bound, cleaned_df[column])
-                    cleaning_log.append(f"INFO: {outliers.sum()} valeurs aberrantes pour '{column}' ont été plafonnées (winsorized).")
+    # Bornes de toutes les colonnes en une passe, puis un seul masque combiné
+    # (voir backend.outliers pour la sémantique flag / cap / remove)
+    with recorder.stage(OUTLIER_STAGE, cleaned_df) as stage:
+        numeric_cols_for_outliers = cleaned_df.select_dtypes(include=np.number).columns
+        if outlier_strategy != 'none' and outlier_method == 'iqr' and not numeric_cols_for_outliers.empty:
+            bounds = pd.concat(_map_columns(_iqr_bounds_block, cleaned_df, numeric_cols_for_outliers,
+                                            pool, n_jobs, iqr_multiplier))
+            cleaned_df = apply_outlier_strategy(cleaned_df, bounds, outlier_strategy, cleaning_log)
+            _record_recipe(cleaned_df, outlier_bounds={col: [recipe_value(row['lower']), recipe_value(row['upper'])]
+                                                       for col, row in bounds.iterrows()})
+        stage.output(cleaned_df)
+    return cleaned_df, cleaning_log
 
+def _handle_missing_values(cleaned_df, missing_value_strategy, pool=None, n_jobs=1, recorder=None):
+    """Étape 8 : valeurs manquantes."""
+    recorder = recorder or StageRecorder()
+    cleaning_log = []
     # --- 8. Gestion des Valeurs Manquantes (Imputation) ---
-    if missing_value_strategy != 'none':
-        for column in cleaned_df.columns:
-            if cleaned_df[column].isnull().sum() > 0:
-                if missing_value_strategy == 'remove_row':
-                    cleaned_df.dropna(subset=[column], inplace=True)
-                    cleaning_log.append(f"INFO: Lignes avec valeurs manquantes pour '{column}' supprimées.")
-                elif missing_value_strategy == 'auto':
-                    dtype = cleaned_df[column].dtype
-                    if pd.api.types.is_numeric_dtype(dtype):
-                        # La médiane est plus robuste aux outliers que la moyenne 
-                        impute_value = cleaned_df[column].median()
-                        cleaned_df[column].fillna(impute_value, inplace=True)
-                        cleaning_log.append(f"INFO: Valeurs manquantes de '{column}' remplacées par la médiane ({impute_value:.2f}).")
-                    elif pd.api.types.is_categorical_dtype(dtype) or pd.api.types.is_object_dtype(dtype):
-                        # Le mode est le choix standard pour les variables catégorielles 
-                        impute_value = cleaned_df[column].mode()[0]
-                        cleaned_df[column].fillna(impute_value, inplace=True)
-                        cleaning_log.append(f"INFO: Valeurs manquantes de '{column}' remplacées par le mode ('{impute_value}').")
-                    else: # Dates, booléens...
-                        impute_value = cleaned_df[column].mode()[0]
-                        cleaned_df[column].fillna(impute_value, inplace=True)
-                        cleaning_log.append(f"INFO: Valeurs manquantes de '{column}' remplacées par la valeur la plus fréquente ('{impute_value}').")
-    
+    # Un seul masque de nuls, puis un unique dropna ou fillna (voir backend.imputation)
+    with recorder.stage(MISSING_STAGE, cleaned_df) as stage:
+        if missing_value_strategy != 'none':
+            values = None
+            if missing_value_strategy == 'auto':
+                # Médianes et modes calculés ici (par blocs dans le pool pour les jeux larges),
+                # appliqués en un seul fillna et conservés dans la recette
+                null_cols = cleaned_df.columns[cleaned_df.isna().any().to_numpy()]
+                values = {}
+                for block_values in _map_columns(_imputation_values_block, cleaned_df, null_cols, pool, n_jobs):
+                    values.update(block_values)
+            cleaned_df = impute_missing_values(cleaned_df, missing_value_strategy, cleaning_log, values=values)
+            if values is not None:
+                _record_recipe(cleaned_df, imputation_values={col: recipe_value(value) for col, value in values.items()})
+        stage.output(cleaned_df)
+    return cleaned_df, cleaning_log
+
+def _optimize_memory(cleaned_df, recorder=None):
+    """Étape 9 (optionnelle) : types compacts."""
+    recorder = recorder or StageRecorder()
+    cleaning_log = []
+    # --- 9. Optimisation Mémoire ---
+    # Entiers et flottants réduits, textes en catégories ou chaînes Arrow (voir backend.optimization)
+    with recorder.stage(MEMORY_STAGE, cleaned_df) as stage:
+        cleaned_df = optimize_memory(cleaned_df, cleaning_log)
+        stage.output(cleaned_df)
+    return cleaned_df, cleaning_log
+
+def _run_stage(key, compute, recorder, label, source):
+    """
+    Exécute une étape sur `source`, ou la reprend du cache si `key` y figure déjà.
+    Le résultat est renvoyé sous forme de copie superficielle : les étapes
+    suivantes remplacent des colonnes sans toucher à l'entrée mise en cache.
+    """
+    result = _stage_cache.get(key) if key is not None else None
+    if result is not None:
+        recorder.cached(label, source, result[0])
+    else:
+        result = compute()
+        if key is not None:
+            _stage_cache.put(key, result)
+    stage_df, stage_log = result
+    return stage_df.copy(deep=False), list(stage_log)
+
+def clean_data(df, 
+               missing_value_strategy='auto', 
+               missing_col_threshold=0.8, 
+               outlier_strategy='flag',
+               outlier_method='iqr', 
+               iqr_multiplier=1.5,
+               dedup_subset=None,
+               optimize_memory=False,
+               use_cache=True,
+               n_jobs=1,
+               copy_on_write=False,
+               memory_report=False,
+               profile=False):
+    """
+    Pipeline de nettoyage de données unifié, configurable et robuste.
+    Retourne le DataFrame nettoyé et un journal des opérations.
+
+    `dedup_subset` restreint la recherche de doublons (étape 4) à une liste de
+    colonnes formant une clé ; par défaut, les lignes entières sont comparées.
+
+    `optimize_memory=True` ajoute une étape finale qui compacte les types
+    (entiers et flottants réduits, textes en catégories ou chaînes Arrow) et
+    indique dans le journal la mémoire occupée avant et après.
+
+    Les étapes sont mises en cache (voir `backend.cache`) : les étapes 1 à 6 sous
+    l'empreinte du contenu de `df`, `missing_col_threshold` et `dedup_subset`, l'étape 7 sous
+    cette clé et les paramètres d'outliers, l'étape 8 sous la clé précédente et
+    `missing_value_strategy`. Changer une option tardive ne relance donc que les
+    étapes concernées. `use_cache=False` force un recalcul complet.
+
+    `n_jobs` > 1 (ou -1 pour tous les cœurs) répartit les traitements par colonne
+    (étapes 3 et 6, bornes IQR de l'étape 7, médianes et modes de l'étape 8) sur
+    un pool de processus, par blocs de colonnes ; les colonnes numériques sont
+    transmises en mémoire partagée. Les résultats et le journal sont fusionnés
+    dans l'ordre des colonnes : ils sont identiques à ceux de l'exécution en série.
+
+    `copy_on_write=True` exécute le nettoyage avec le copy-on-write de pandas :
+    pas de copie initiale, et les colonnes que le nettoyage ne modifie pas
+    restent partagées avec `df` au lieu d'être dupliquées. Le pic mémoire reste
+    ainsi proche d'une seule copie des données, même si l'appelant garde `df`.
+
+    Le DataFrame nettoyé porte dans `attrs['cleaning_recipe']` la recette du
+    nettoyage (renommages, types, colonnes supprimées, bornes IQR, valeurs
+    d'imputation, options), rejouable sur un nouveau fichier de même structure
+    avec `backend.recipe.apply_recipe`.
+
+    `memory_report=True` ajoute un troisième élément au résultat : un DataFrame
+    donnant, pour chaque étape, la mémoire allouée au pic et à la fin (voir
+    `backend.profiling.StageRecorder`).
+
+    `profile=True` complète ce tableau pour repérer l'étape la plus coûteuse :
+    durée réelle et temps CPU, pic mémoire, lignes et colonnes en entrée et en
+    sortie de chaque étape. Il est renvoyé de la même façon, en troisième élément.
+    """
+    with_report = memory_report or profile
+    if df is None or df.empty:
+        if with_report:
+            return pd.DataFrame(), ["Le DataFrame initial est vide."], StageRecorder(profile=profile).report()
+        return pd.DataFrame(), ["Le DataFrame initial est vide."]
+
+    with _copy_on_write(copy_on_write), StageRecorder(memory=memory_report, profile=profile) as recorder:
+        cleaned_df, cleaning_log = _run_pipeline(df, missing_value_strategy, missing_col_threshold, outlier_strategy,
+                                                 outlier_method, iqr_multiplier, dedup_subset, optimize_memory,
+                                                 use_cache, n_jobs, recorder)
+    _record_recipe(cleaned_df, options={
+        'missing_value_strategy': missing_value_strategy, 'missing_col_threshold': missing_col_threshold,
+        'outlier_strategy': outlier_strategy, 'outlier_method': outlier_method, 'iqr_multiplier': iqr_multiplier,
+        'optimize_memory': optimize_memory})
+
     final_shape = cleaned_df.shape
     cleaning_log.append(f"SUCCÈS: Nettoyage terminé. Taille finale du DataFrame : {final_shape}.")
-    
-    return cleaned_df, cleaning_log
\ No newline at end of file
+
+    if with_report:
+        return cleaned_df, cleaning_log, recorder.report()
+    return cleaned_df, cleaning_log
+
+def _copy_on_write(enabled):
+    """Active le copy-on-write de pandas le temps du nettoyage (toujours actif à partir de pandas 3)."""
+    if not enabled or int(pd.__version__.split('.')[0]) >= 3:
+        return contextlib.nullcontext()
+    return pd.option_context('mode.copy_on_write', True)
+
+def _run_pipeline(df, missing_value_strategy, missing_col_threshold, outlier_strategy,
+                  outlier_method, iqr_multiplier, dedup_subset, optimize, use_cache, n_jobs, recorder):
+    """Enchaîne les trois groupes d'étapes mis en cache (voir `clean_data`)."""
+    n_jobs = resolve_n_jobs(n_jobs)
+    # Les processus ne démarrent qu'au premier envoi : rien n'est lancé si tout vient du cache
+    pool = ProcessPoolExecutor(max_workers=n_jobs) if n_jobs > 1 else None
+    try:
+        # n_jobs ne change pas le résultat : il ne fait pas partie des clés de cache
+        subset_key = tuple(dedup_subset) if dedup_subset else None
+        key = (fingerprint_frame(df), missing_col_threshold, subset_key) if use_cache else None
+        cleaned_df, cleaning_log = _run_stage(
+            key, lambda: _prepare_data(df, missing_col_threshold, dedup_subset, pool, n_jobs, recorder),
+            recorder, PREPARE_STAGES, df)
+
+        if key is not None:
+            key = key + (outlier_strategy, outlier_method, iqr_multiplier)
+        prepared_df = cleaned_df
+        cleaned_df, stage_log = _run_stage(
+            key, lambda: _handle_outliers(prepared_df, outlier_strategy, outlier_method, iqr_multiplier, pool, n_jobs, recorder),
+            recorder, OUTLIER_STAGE, prepared_df)
+        cleaning_log += stage_log
+
+        if key is not None:
+            key = key + (missing_value_strategy,)
+        outliers_df = cleaned_df
+        cleaned_df, stage_log = _run_stage(
+            key, lambda: _handle_missing_values(outliers_df, missing_value_strategy, pool, n_jobs, recorder),
+            recorder, MISSING_STAGE, outliers_df)
+        cleaning_log += stage_log
+
+        if optimize:
+            if key is not None:
+                key = key + ('optimize_memory',)
+            imputed_df = cleaned_df
+            cleaned_df, stage_log = _run_stage(key, lambda: _optimize_memory(imputed_df, recorder),
+                                               recorder, MEMORY_STAGE, imputed_df)
+            cleaning_log += stage_log
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return cleaned_df, cleaning_log
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from backend.cache import dataset_store
+from backend.dedup import count_duplicates
+
+# Nombre de modalités les plus fréquentes gardées par colonne catégorielle
+TOP_VALUES = 20
+# Lignes parcourues pour trouver des exemples de valeurs avant de balayer toute la colonne
+EXAMPLE_SCAN_ROWS = 1000
+
+
+def _examples(series, n=3):
+    """Premières valeurs distinctes non nulles, dans l'ordre d'apparition (comme `dropna().unique()[:n]`)."""
+    non_null = series.dropna()
+    examples = non_null.head(EXAMPLE_SCAN_ROWS).unique()[:n]
+    if len(examples) < n and len(non_null) > EXAMPLE_SCAN_ROWS:
+        examples = non_null.unique()[:n]
+    return list(examples)
+
+
+class DatasetProfile:
+    """
+    Statistiques d'un jeu de données partagées par la vue d'ensemble, les
+    recommandations et le rapport PDF, calculées ensemble en une fois :
+
+    - structure : dimensions, types, mémoire, exemples de valeurs ;
+    - complétude : valeurs manquantes par colonne, doublons ;
+    - colonnes numériques : `describe()` (quartiles compris), variance,
+      asymétrie, nombre de valeurs hors des bornes IQR, corrélations ;
+    - colonnes catégorielles : nombre de modalités et les `TOP_VALUES` plus fréquentes.
+
+    S'obtient par `get_dataset_profile(df)`, qui le mémorise avec le jeu de données.
+    """
+
+    def __init__(self, df, iqr_multiplier=1.5):
+        self.n_rows, self.n_columns = df.shape
+        self.dtypes = df.dtypes
+        self.memory_bytes = int(df.memory_usage(deep=True).sum())
+        self.examples = {col: _examples(df[col]) for col in df.columns}
+
+        self.null_counts = df.isna().sum()
+        self.total_missing = int(self.null_counts.sum())
+        self.completeness = (1 - self.total_missing / df.size) * 100 if df.size else 100.0
+        self.duplicates = count_duplicates(df)
+
+        self.numeric_columns = df.select_dtypes(include=np.number).columns.tolist()
+        numeric = df[self.numeric_columns]
+        if self.numeric_columns:
+            self.describe = numeric.describe().T
+            self.variance = self.describe['std'] ** 2
+            self.skewness = numeric.skew()
+            iqr = self.describe['75%'] - self.describe['25%']
+            lower = self.describe['25%'] - iqr_multiplier * iqr
+            upper = self.describe['75%'] + iqr_multiplier * iqr
+            self.outlier_counts = numeric.lt(lower).sum() + numeric.gt(upper).sum()
+            self.correlation = numeric.corr()
+        else:
+            self.describe = pd.DataFrame(columns=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'])
+            self.variance = self.skewness = self.outlier_counts = pd.Series(dtype='float64')
+            self.correlation = pd.DataFrame()
+
+        self.categorical_columns = df.select_dtypes(include=['object', 'category', 'string']).columns.tolist()
+        self.value_counts = {}
+        nunique = {}
+        for col in self.categorical_columns:
+            counts = df[col].value_counts()
+            nunique[col] = len(counts)
+            self.value_counts[col] = counts.head(TOP_VALUES)
+        self.nunique = pd.Series(nunique, dtype='int64')
+
+    def analysis_columns(self):
+        """Colonnes numériques hors indicateurs de valeurs aberrantes ('<colonne>_outlier')."""
+        return [col for col in self.numeric_columns if not str(col).endswith('_outlier')]
+
+    def non_null_counts(self):
+        return self.n_rows - self.null_counts
+
+
+def get_dataset_profile(df):
+    """Profil de `df`, calculé au premier appel puis mémorisé avec le jeu de données (voir `dataset_store`)."""
+    store = dataset_store(df)
+    if 'profile' not in store:
+        store['profile'] = DatasetProfile(df)
+    return store['profile']
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from backend.cache import dataset_store
+
+
+def _resolve_subset(df, subset):
+    """Colonnes de la clé de doublon : toutes si `subset` est vide, sinon celles présentes dans `df`."""
+    if not subset:
+        return list(df.columns)
+    return [col for col in subset if col in df.columns]
+
+
+def row_hashes(df, subset=None):
+    """Hash 64 bits de chaque ligne, restreint aux colonnes de `subset` (toutes par défaut)."""
+    columns = _resolve_subset(df, subset)
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def duplicate_mask(df, subset=None):
+    """
+    Masque des lignes qui répètent une ligne précédente (comme `duplicated()`),
+    sur les colonnes de `subset` ou sur toutes.
+
+    Les lignes sont d'abord comparées par leur hash 64 bits ; seules celles dont
+    le hash apparaît plusieurs fois sont ensuite comparées exactement, si bien
+    qu'une collision de hash ne fait jamais supprimer une ligne distincte.
+    """
+    columns = _resolve_subset(df, subset)
+    if not columns or df.empty:
+        return np.zeros(len(df), dtype=bool)
+    candidates = pd.Series(row_hashes(df, columns)).duplicated(keep=False).to_numpy()
+    mask = np.zeros(len(df), dtype=bool)
+    if candidates.any():
+        mask[candidates] = df.loc[candidates, columns].duplicated().to_numpy()
+    return mask
+
+
+def duplicate_stats(df, subset=None):
+    """
+    Nombre de doublons et masque correspondant, calculés une fois par jeu de
+    données (et par clé) puis réutilisés par la vue d'ensemble, les
+    recommandations et le rapport PDF.
+    """
+    store = dataset_store(df)
+    key = ('duplicates', tuple(subset) if subset else None)
+    if key not in store:
+        mask = duplicate_mask(df, subset)
+        store[key] = (int(mask.sum()), mask)
+    return store[key]
+
+
+def count_duplicates(df, subset=None):
+    """Nombre de lignes en double (mémorisé avec le jeu de données)."""
+    return duplicate_stats(df, subset)[0]
+
+
+class ChunkedDeduplicator:
+    """
+    Repérage des doublons sur des données lues bloc par bloc (voir `backend.outofcore`).
+
+    Seuls les hashes 64 bits des lignes déjà vues sont gardés (8 octets par ligne
+    unique), sous forme de tableaux triés dont les tailles suivent les puissances
+    de deux (fusionnés comme un compteur binaire) : une recherche coûte O(log n)
+    par tableau, avec au plus O(log n) tableaux. Les blocs précédents n'étant plus
+    en mémoire, une collision de hash (très improbable) ferait retirer une ligne à tort.
+    """
+
+    def __init__(self, subset=None):
+        self.subset = subset
+        self.duplicates = 0
+        self._runs = []
+
+    def _seen(self, hashes):
+        seen = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            positions = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            seen |= run[positions] == hashes
+        return seen
+
+    def keep_mask(self, chunk):
+        """Masque des lignes du bloc vues pour la première fois ; les autres sont des doublons."""
+        hashes = row_hashes(chunk, self.subset)
+        first = ~pd.Series(hashes).duplicated().to_numpy()
+        first &= ~self._seen(hashes)
+        new = np.sort(hashes[first])
+        if len(new):
+            self._runs.append(new)
+            while len(self._runs) > 1 and len(self._runs[-2]) <= len(self._runs[-1]):
+                last = self._runs.pop()
+                self._runs[-1] = np.sort(np.concatenate([self._runs[-1], last]))
+        self.duplicates += int((~first).sum())
+        return first
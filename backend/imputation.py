@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+
+def is_median_column(dtype):
+    """Médiane pour les numériques ; les booléens sont traités comme des catégories (mode)."""
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def compute_imputation_values(df, columns):
+    """
+    Valeurs de remplacement de chaque colonne, calculées en bloc : médianes des
+    colonnes numériques en un appel, modes des autres colonnes en un autre.
+    """
+    median_cols = [col for col in columns if is_median_column(df[col].dtype)]
+    mode_cols = [col for col in columns if col not in set(median_cols)]
+
+    values = {}
+    if median_cols:
+        medians = df[median_cols].median()
+        for col in median_cols:
+            value = medians[col]
+            # Une médiane non entière ne peut pas remplir une colonne entière (Int8...)
+            if pd.api.types.is_integer_dtype(df[col].dtype) and not pd.isna(value):
+                value = int(round(value))
+            values[col] = value
+    if mode_cols:
+        modes = df[mode_cols].mode(dropna=True)
+        for col in mode_cols:
+            values[col] = modes[col].iloc[0] if not modes.empty else np.nan
+    return values
+
+
+def log_imputation(column, dtype, value, cleaning_log):
+    if is_median_column(dtype):
+        # La médiane est plus robuste aux outliers que la moyenne
+        cleaning_log.append(f"INFO: Valeurs manquantes de '{column}' remplacées par la médiane ({value:.2f}).")
+    elif isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_object_dtype(dtype):
+        # Le mode est le choix standard pour les variables catégorielles
+        cleaning_log.append(f"INFO: Valeurs manquantes de '{column}' remplacées par le mode ('{value}').")
+    else: # Dates, booléens...
+        cleaning_log.append(f"INFO: Valeurs manquantes de '{column}' remplacées par la valeur la plus fréquente ('{value}').")
+
+
+def impute_missing_values(df, missing_value_strategy, cleaning_log, values=None):
+    """
+    Traitement des valeurs manquantes en une passe, à partir d'un seul masque de nuls :
+
+    - 'remove_row' : un unique `dropna` sur l'ensemble des colonnes concernées ;
+    - 'auto' : un unique `fillna` avec un dictionnaire colonne -> valeur
+      (médiane pour les numériques, mode sinon), calculé par `compute_imputation_values`
+      sauf si `values` est fourni.
+
+    Le journal produit est identique à celui du traitement colonne par colonne.
+    """
+    null_mask = df.isna()
+    null_counts = null_mask.sum()
+    columns = null_counts[null_counts > 0].index.tolist()
+    if not columns or missing_value_strategy not in ('remove_row', 'auto'):
+        return df
+
+    if missing_value_strategy == 'remove_row':
+        # Une colonne n'était journalisée que s'il lui restait des nuls après la
+        # suppression due aux colonnes précédentes : c'est la première colonne
+        # nulle de chaque ligne.
+        row_nulls = null_mask[columns].to_numpy()
+        rows_with_nulls = row_nulls.any(axis=1)
+        first_null = np.unique(row_nulls[rows_with_nulls].argmax(axis=1))
+        for position in first_null:
+            cleaning_log.append(f"INFO: Lignes avec valeurs manquantes pour '{columns[position]}' supprimées.")
+        return df[~rows_with_nulls]
+
+    if values is None:
+        values = compute_imputation_values(df, columns)
+    fill_values = {col: values[col] for col in columns if col in values and not pd.isna(values[col])}
+    for col in columns:
+        if col in fill_values:
+            log_imputation(col, df[col].dtype, fill_values[col], cleaning_log)
+    return df.fillna(fill_values)
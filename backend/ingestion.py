@@ -0,0 +1,515 @@
+import codecs
+import csv
+import gzip
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+from backend.typeinference import detect_datetime_format, narrowest_integer_dtype
+
+# Nombre de lignes lues à chaque bloc en mode streaming
+CSV_CHUNK_ROWS = 200_000
+# Au-delà de cette taille (en octets), les CSV sont lus par blocs
+CHUNKED_READ_THRESHOLD = 50 * 1024 * 1024
+# Nombre de lignes Excel accumulées avant conversion en DataFrame compact
+EXCEL_BATCH_ROWS = 50_000
+# Colonne ajoutée pour identifier la feuille d'origine quand plusieurs feuilles sont importées
+SHEET_COLUMN = 'feuille'
+# Formats colonnaires lus via pyarrow
+ARROW_EXTENSIONS = ('.parquet', '.feather', '.arrow', '.ipc')
+# Signatures (magic bytes) des formats compressés acceptés
+COMPRESSION_MAGIC = {
+    b'\x1f\x8b': 'gzip',
+    b'\x28\xb5\x2f\xfd': 'zstd',
+    b'PK\x03\x04': 'zip',
+}
+COMPRESSION_SUFFIXES = ('.gz', '.gzip', '.zst', '.zstd', '.zip')
+# Taille de l'échantillon lu pour détecter encodage, séparateurs et types
+SNIFF_BYTES = 4 * 1024 * 1024
+# Encodages essayés dans l'ordre ; latin-1 décode toujours et sert de dernier recours
+CANDIDATE_ENCODINGS = ('utf-8', 'cp1252', 'latin-1')
+CANDIDATE_DELIMITERS = ',;\t|'
+# Nombre décimal à la française : "1 234,56" ou "-3,5"
+FRENCH_DECIMAL_PATTERN = re.compile(r'^[+-]?\d{1,3}(?:[ \u00a0]?\d{3})*,\d+$|^[+-]?\d+,\d+$')
+
+
+def get_file_size(source):
+    """Taille en octets d'un fichier importé (UploadedFile Streamlit ou fichier ouvert)."""
+    size = getattr(source, 'size', None)
+    if size is None:
+        position = source.tell()
+        source.seek(0, 2)
+        size = source.tell()
+        source.seek(position)
+    return size
+
+
+def compact_dtypes(df):
+    """
+    Convertit les colonnes numériques vers le type le plus compact sans perte :
+    entiers réduits (int8/int16/int32, ou Int8/Int16/Int32 pour les entiers
+    nullables imposés par `sniff_csv`) et flottants en float32 lorsque toutes
+    les valeurs sont représentables exactement.
+    """
+    for col in df.columns:
+        series = df[col]
+        dtype = series.dtype
+        if isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+            df[col] = pd.to_numeric(series, downcast='integer' if dtype.kind == 'i' else 'unsigned')
+        elif isinstance(dtype, (pd.Int64Dtype, pd.Int32Dtype, pd.Int16Dtype)):
+            df[col] = series.astype(narrowest_integer_dtype(series.dropna()))
+        elif isinstance(dtype, np.dtype) and dtype.kind == 'f' and dtype.itemsize > 4:
+            downcast = series.astype(np.float32)
+            if ((downcast == series) | series.isna()).all():
+                df[col] = downcast
+    return df
+
+
+def _harmonize_chunk_dtypes(chunks):
+    """
+    Une colonne peut être inférée numérique dans un bloc et texte dans un autre.
+    Dans ce cas on ramène les blocs numériques en texte, comme l'aurait fait une
+    lecture en une seule passe, plutôt que de mélanger nombres et chaînes.
+    """
+    columns = dict.fromkeys(col for chunk in chunks for col in chunk.columns)
+    for col in columns:
+        holders = [chunk for chunk in chunks if col in chunk.columns]
+        kinds = {chunk[col].dtype == object for chunk in holders}
+        if len(kinds) > 1:
+            for chunk in holders:
+                if chunk[col].dtype != object:
+                    series = chunk[col]
+                    chunk[col] = series.astype(str).where(series.notna())
+    return chunks
+
+
+def read_csv_chunked(source, chunksize=CSV_CHUNK_ROWS, progress_callback=None, sampler=None, **read_kwargs):
+    """
+    Lecture d'un CSV par blocs avec une mémoire bornée.
+
+    Chaque bloc est compacté (voir `compact_dtypes`) dès sa lecture, si bien que
+    seule la version compacte des données est conservée. `progress_callback`
+    reçoit la fraction du fichier déjà lue et le nombre de lignes chargées.
+    Si un `sampler` (voir `backend.sampling.ReservoirSampler`) est fourni, il
+    reçoit chaque bloc pour constituer un échantillon pendant la lecture.
+    """
+    total_size = get_file_size(source) or 1
+    chunks = []
+    rows_read = 0
+    with pd.read_csv(source, chunksize=chunksize, **read_kwargs) as reader:
+        for chunk in reader:
+            chunks.append(compact_dtypes(chunk))
+            rows_read += len(chunk)
+            if sampler is not None:
+                sampler.add(chunk)
+            if progress_callback is not None:
+                progress_callback(min(source.tell() / total_size, 1.0), rows_read)
+
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+    chunks = _harmonize_chunk_dtypes(chunks)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _detect_encoding(raw, truncated):
+    """Premier encodage candidat capable de décoder l'échantillon."""
+    if raw.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    for encoding in CANDIDATE_ENCODINGS:
+        try:
+            # Décodeur incrémental : un caractère multi-octets coupé en fin d'échantillon n'est pas une erreur
+            codecs.getincrementaldecoder(encoding)().decode(raw, final=not truncated)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1'
+
+
+def _detect_delimiter(text):
+    """Séparateur de champs, via csv.Sniffer puis par comptage sur l'en-tête."""
+    try:
+        return csv.Sniffer().sniff(text[:64 * 1024], delimiters=CANDIDATE_DELIMITERS).delimiter
+    except csv.Error:
+        header = text.split('\n', 1)[0]
+        counts = {d: header.count(d) for d in CANDIDATE_DELIMITERS}
+        best = max(counts, key=counts.get)
+        return best if counts[best] > 0 else ','
+
+
+def _detect_decimal(sample_df):
+    """
+    Virgule décimale si la majorité des valeurs d'une colonne texte ressemble à
+    '12,5'. Retourne aussi le séparateur de milliers éventuel ('1 234,5').
+    """
+    for col in sample_df.select_dtypes(include='object').columns:
+        values = sample_df[col].dropna().astype(str).str.strip()
+        if len(values) > 0 and values.str.match(FRENCH_DECIMAL_PATTERN).mean() > 0.8:
+            for separator in (' ', '\u00a0'):
+                if values.str.contains(separator, regex=False).any():
+                    return ',', separator
+            return ',', None
+    return '.', None
+
+
+def _infer_sample_schema(sample_df):
+    """Types explicites par colonne (dtype, parse_dates, date_format) déduits de l'échantillon."""
+    dtypes, parse_dates, date_formats = {}, [], {}
+    for col in sample_df.columns:
+        series = sample_df[col]
+        non_null = series.dropna()
+        if non_null.empty:
+            continue  # Rien à déduire, pandas infère sur le fichier complet
+        if pd.api.types.is_bool_dtype(series.dtype):
+            dtypes[col] = 'boolean'
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            # Entier nullable : une valeur manquante plus loin ne casse pas la lecture typée
+            dtypes[col] = 'Int64'
+        elif pd.api.types.is_float_dtype(series.dtype):
+            dtypes[col] = 'float64'
+        else:
+            date_format = detect_datetime_format(non_null)
+            if date_format is not None:
+                parse_dates.append(col)
+                date_formats[col] = date_format
+                continue
+            dtypes[col] = 'object'
+    return dtypes, parse_dates, date_formats
+
+
+def sniff_csv(source, sample_bytes=SNIFF_BYTES):
+    """
+    Lit les premiers Mo du fichier pour en déduire les paramètres de lecture :
+    encodage, séparateur, séparateur décimal, colonnes utiles et types.
+    Retourne un dictionnaire d'arguments pour `pd.read_csv`.
+    """
+    raw = source.read(sample_bytes)
+    source.seek(0)
+    truncated = len(raw) == sample_bytes
+    encoding = _detect_encoding(raw, truncated)
+    text = raw.decode(encoding, errors='replace')
+    if truncated and '\n' in text:
+        # Ignore la dernière ligne, probablement coupée
+        text = text[:text.rfind('\n') + 1]
+
+    delimiter = _detect_delimiter(text)
+    sample_df = pd.read_csv(io.StringIO(text), sep=delimiter)
+    decimal, thousands = _detect_decimal(sample_df) if delimiter != ',' else ('.', None)
+    if decimal != '.':
+        sample_df = pd.read_csv(io.StringIO(text), sep=delimiter, decimal=decimal, thousands=thousands)
+
+    # Colonnes sans en-tête et sans valeur : artefact d'un séparateur en fin de ligne
+    usecols = [col for col in sample_df.columns
+               if not (str(col).startswith('Unnamed:') and sample_df[col].isna().all())]
+    dtypes, parse_dates, date_formats = _infer_sample_schema(sample_df[usecols])
+
+    read_kwargs = {'encoding': encoding, 'encoding_errors': 'replace',
+                   'sep': delimiter, 'decimal': decimal, 'thousands': thousands,
+                   'usecols': usecols, 'dtype': dtypes}
+    if parse_dates:
+        read_kwargs['parse_dates'] = parse_dates
+        read_kwargs['date_format'] = date_formats
+    return read_kwargs
+
+
+def load_csv(source, chunksize=None, progress_callback=None, sampler=None):
+    """
+    Lecture typée d'un CSV en une seule passe, à partir des paramètres de `sniff_csv`.
+    Si les types déduits de l'échantillon sont contredits plus loin dans le fichier,
+    la lecture est refaite sans types imposés.
+    """
+    read_kwargs = sniff_csv(source)
+    try:
+        return _read_csv(source, chunksize, progress_callback, sampler, **read_kwargs)
+    except (ValueError, TypeError):
+        source.seek(0)
+        for key in ('dtype', 'parse_dates', 'date_format'):
+            read_kwargs.pop(key, None)
+        if sampler is not None:
+            sampler.reset()
+        return _read_csv(source, chunksize, progress_callback, sampler, **read_kwargs)
+
+
+def _read_csv(source, chunksize, progress_callback, sampler, **read_kwargs):
+    if chunksize:
+        return read_csv_chunked(source, chunksize=chunksize, progress_callback=progress_callback,
+                                sampler=sampler, **read_kwargs)
+    return pd.read_csv(source, **read_kwargs)
+
+
+def _read_source_bytes(source):
+    """Contenu binaire complet d'un fichier importé."""
+    source.seek(0)
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    return source.read()
+
+
+def list_excel_sheets(source):
+    """Noms des feuilles d'un classeur, sans charger les cellules."""
+    source.seek(0)
+    if source.name.endswith('.xlsx'):
+        from openpyxl import load_workbook
+        workbook = load_workbook(source, read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+            source.seek(0)
+    sheet_names = pd.ExcelFile(source).sheet_names
+    source.seek(0)
+    return sheet_names
+
+
+def _excel_header(header_row):
+    """Noms de colonnes à la manière de pandas : 'Unnamed: i' pour les vides, suffixes pour les doublons."""
+    columns, seen = [], {}
+    for i, value in enumerate(header_row):
+        name = f"Unnamed: {i}" if value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+
+def read_xlsx_sheet(content, sheet_name, batch_rows=EXCEL_BATCH_ROWS):
+    """
+    Lecture d'une feuille .xlsx en streaming (openpyxl en mode read_only) :
+    les lignes sont converties par lots en DataFrames compacts, sans jamais
+    charger l'arbre XML complet du classeur.
+    """
+    from openpyxl import load_workbook
+    workbook = load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+        columns = _excel_header(header)
+        width = len(columns)
+
+        batches, batch, pending_empty = [], [], []
+        for row in rows:
+            if len(row) != width:
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+            # Les lignes vides ne sont gardées que si une ligne remplie suit (pas de traîne vide)
+            if all(value is None for value in row):
+                pending_empty.append(row)
+                continue
+            batch.extend(pending_empty)
+            pending_empty = []
+            batch.append(row)
+            if len(batch) >= batch_rows:
+                batches.append(compact_dtypes(pd.DataFrame.from_records(batch, columns=columns)))
+                batch = []
+        if batch or not batches:
+            batches.append(compact_dtypes(pd.DataFrame.from_records(batch, columns=columns)))
+    finally:
+        workbook.close()
+
+    if len(batches) == 1:
+        return batches[0]
+    return pd.concat(_harmonize_chunk_dtypes(batches), ignore_index=True)
+
+
+def load_excel(source, sheet_names=None, max_workers=None):
+    """
+    Chargement d'une ou plusieurs feuilles Excel (première feuille par défaut).
+
+    Les feuilles .xlsx sont lues en streaming et, quand il y en a plusieurs,
+    en parallèle dans des processus séparés. Plusieurs feuilles sont empilées
+    avec une colonne `SHEET_COLUMN` indiquant leur origine.
+    """
+    if not sheet_names:
+        sheet_names = list_excel_sheets(source)[:1]
+
+    if source.name.endswith('.xlsx'):
+        content = _read_source_bytes(source)
+        if len(sheet_names) == 1:
+            frames = [read_xlsx_sheet(content, sheet_names[0])]
+        else:
+            max_workers = max_workers or min(len(sheet_names), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                frames = list(executor.map(read_xlsx_sheet, [content] * len(sheet_names), sheet_names))
+    else:
+        # Le format .xls (xlrd) ne permet pas de lecture en streaming
+        source.seek(0)
+        sheets = pd.read_excel(source, sheet_name=list(sheet_names))
+        frames = [sheets[name] for name in sheet_names]
+
+    if len(frames) == 1:
+        return frames[0]
+    for name, frame in zip(sheet_names, frames):
+        frame.insert(0, SHEET_COLUMN, name)
+    return pd.concat(_harmonize_chunk_dtypes(frames), ignore_index=True)
+
+
+def _arrow_pandas_dtype(arrow_type):
+    """
+    Type pandas d'une colonne Arrow : `pd.ArrowDtype`, sauf pour les textes et les
+    colonnes sans aucune valeur, convertis comme un CSV (objets, manquants à None)
+    pour que les graphiques et l'interface les traitent de la même façon.
+    """
+    import pyarrow as pa
+
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type) or pa.types.is_null(arrow_type):
+        return None
+    return pd.ArrowDtype(arrow_type)
+
+
+def load_arrow(source):
+    """
+    Chargement Parquet, Feather ou Arrow IPC avec des types Arrow (`pd.ArrowDtype`),
+    les colonnes texte et vides exceptées (voir `_arrow_pandas_dtype`).
+
+    Un chemin de fichier est projeté en mémoire (memory map) : les colonnes
+    ne sont lues sur disque qu'au moment où elles sont utilisées. Un fichier
+    importé est lu directement depuis son tampon, sans copie. Pour Feather et
+    Arrow IPC non compressés, la conversion vers pandas est elle aussi sans copie
+    (hors colonnes texte, converties en objets).
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    if isinstance(source, (str, os.PathLike)):
+        name = os.fspath(source)
+        reader = pa.memory_map(name, 'r')
+    else:
+        name = source.name
+        source.seek(0)
+        buffer = source.getbuffer() if hasattr(source, 'getbuffer') else source.read()
+        reader = pa.BufferReader(pa.py_buffer(buffer))
+
+    if name.endswith('.parquet'):
+        table = pq.read_table(reader)
+    else:
+        # Feather v2 et Arrow IPC partagent le même format de fichier
+        table = feather.read_table(reader)
+    return table.to_pandas(types_mapper=_arrow_pandas_dtype)
+
+
+def detect_compression(source):
+    """Format de compression ('gzip', 'zstd', 'zip') d'après les premiers octets, ou None."""
+    source.seek(0)
+    head = source.read(4)
+    source.seek(0)
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+class DecompressedSource(io.RawIOBase):
+    """
+    Flux décompressé à la volée, lisible directement par `pd.read_csv`.
+
+    Rien n'est écrit sur disque : les octets sont décompressés au fil de la
+    lecture. `seek(0)` relance la décompression depuis le début (utilisé après
+    l'échantillonnage de `sniff_csv`), et `tell()` / `size` portent sur le
+    fichier compressé, ce qui suffit au suivi de progression.
+    """
+
+    def __init__(self, source, compression, name, member=None):
+        super().__init__()
+        self.raw = source
+        self.compression = compression
+        self.name = name
+        self.member = member
+        self.size = get_file_size(source)
+        self._stream = self._open()
+
+    def _open(self):
+        self.raw.seek(0)
+        if self.compression == 'gzip':
+            return gzip.GzipFile(fileobj=self.raw, mode='rb')
+        if self.compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError as e:
+                raise ImportError("Le module 'zstandard' est requis pour lire les fichiers .zst (pip install zstandard).") from e
+            return zstandard.ZstdDecompressor().stream_reader(self.raw, closefd=False)
+        return zipfile.ZipFile(self.raw).open(self.member)
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return self._stream.read()
+        # Les décompresseurs peuvent renvoyer moins que demandé : on complète
+        parts, remaining = [], size
+        while remaining > 0:
+            data = self._stream.read(remaining)
+            if not data:
+                break
+            parts.append(data)
+            remaining -= len(data)
+        return b''.join(parts)
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if offset != 0 or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("Un flux décompressé ne peut être repositionné qu'au début.")
+        self._stream = self._open()
+        return 0
+
+    def tell(self):
+        return self.raw.tell()
+
+
+def _zip_member(archive):
+    """Premier fichier de données d'une archive zip (les dossiers et métadonnées macOS sont ignorés)."""
+    members = [info.filename for info in archive.infolist()
+               if not info.is_dir() and not info.filename.startswith('__MACOSX/')]
+    for member in members:
+        if member.lower().endswith(('.csv', '.xlsx', '.xls') + ARROW_EXTENSIONS):
+            return member
+    if not members:
+        raise ValueError("L'archive zip ne contient aucun fichier.")
+    return members[0]
+
+
+def open_compressed(source):
+    """
+    Renvoie une source lisible par `load_file` : le fichier lui-même s'il n'est
+    pas compressé, sinon son contenu décompressé, nommé d'après le fichier interne.
+
+    Les CSV sont décompressés en streaming. Excel et les formats colonnaires
+    exigent un accès aléatoire et sont donc décompressés en mémoire.
+    """
+    compression = detect_compression(source)
+    # Un classeur .xlsx est lui-même une archive zip
+    if compression is None or (compression == 'zip' and source.name.endswith('.xlsx')):
+        return source
+
+    if compression == 'zip':
+        source.seek(0)
+        with zipfile.ZipFile(source) as archive:
+            member = _zip_member(archive)
+        inner_name = os.path.basename(member)
+    else:
+        member = None
+        inner_name = source.name
+        if inner_name.lower().endswith(COMPRESSION_SUFFIXES):
+            inner_name = os.path.splitext(inner_name)[0]
+        if not os.path.splitext(inner_name)[1]:
+            inner_name += '.csv'
+
+    stream = DecompressedSource(source, compression, inner_name, member)
+    if inner_name.lower().endswith('.csv'):
+        return stream
+    buffer = io.BytesIO(stream.read())
+    buffer.name = inner_name
+    return buffer
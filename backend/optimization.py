@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from backend.typeinference import narrowest_integer_dtype
+
+# Au-dessous de cette part de valeurs distinctes, une colonne texte est encodée en catégorie
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+MB = 1024 * 1024
+
+
+def memory_usage_mb(df):
+    """Mémoire occupée par le DataFrame (chaînes comprises), en Mo."""
+    return df.memory_usage(deep=True).sum() / MB
+
+
+def _optimize_column(series):
+    """Type le plus compact pour une colonne, ou None si elle est déjà optimale."""
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype):
+        return None
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+        narrowed = pd.to_numeric(series, downcast='integer' if dtype.kind == 'i' else 'unsigned')
+        return narrowed if narrowed.dtype != dtype else None
+    if pd.api.types.is_integer_dtype(dtype) and not isinstance(dtype, pd.ArrowDtype):
+        # Entiers nullables (Int8...Int64) : plus petit type contenant toutes les valeurs
+        narrowed = narrowest_integer_dtype(series.dropna())
+        return series.astype(narrowed) if narrowed != str(dtype) else None
+    if isinstance(dtype, np.dtype) and dtype.kind == 'f' and dtype.itemsize > 4:
+        array = series.to_numpy()
+        narrowed = array.astype(np.float32)
+        if np.array_equal(narrowed, array, equal_nan=True):
+            return pd.Series(narrowed, index=series.index, name=series.name)
+        return None
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        if isinstance(dtype, pd.CategoricalDtype):
+            return None
+        non_null = series.count()
+        if not non_null:
+            return None
+        if series.nunique() / non_null < CATEGORY_MAX_UNIQUE_RATIO:
+            # Peu de valeurs distinctes : encodage par dictionnaire
+            return series.astype('category')
+        if pd.api.types.is_object_dtype(dtype) and pd.api.types.infer_dtype(series, skipna=True) == 'string':
+            # Chaînes majoritairement distinctes : stockage Arrow contigu
+            import pyarrow as pa
+            return series.astype(pd.ArrowDtype(pa.string()))
+    return None
+
+
+def optimize_memory(df, cleaning_log=None):
+    """
+    Réduit l'empreinte mémoire d'un DataFrame sans changer ses valeurs :
+
+    - entiers réduits au plus petit type (int8, int16... ou Int8, Int16... s'ils sont nullables) ;
+    - flottants en float32 lorsque la conversion est exacte ;
+    - textes à moins de 50% de valeurs distinctes encodés en catégorie ;
+    - autres textes stockés en chaînes Arrow.
+
+    La mémoire avant et après est ajoutée à `cleaning_log` s'il est fourni.
+    """
+    memory_before = memory_usage_mb(df)
+    optimized = {}
+    for col in df.columns:
+        converted = _optimize_column(df[col])
+        if converted is not None:
+            optimized[col] = converted
+    if optimized:
+        # Copie superficielle : seules les colonnes converties sont remplacées
+        df = df.copy(deep=False)
+        for col, values in optimized.items():
+            df[col] = values
+    if cleaning_log is not None:
+        memory_after = memory_usage_mb(df)
+        ratio = memory_before / memory_after if memory_after else 1.0
+        cleaning_log.append(f"INFO: Optimisation mémoire de {len(optimized)} colonne(s) : "
+                            f"{memory_before:.1f} Mo -> {memory_after:.1f} Mo (÷{ratio:.1f}).")
+    return df
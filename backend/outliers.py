@@ -0,0 +1,59 @@
+import pandas as pd
+
+# Suffixe des colonnes indicatrices créées par la stratégie 'flag'
+OUTLIER_FLAG_SUFFIX = '_outlier'
+
+
+def compute_iqr_bounds(df, columns, iqr_multiplier=1.5):
+    """
+    Bornes IQR de toutes les colonnes en un seul appel à `quantile` sur le bloc numérique.
+    Retourne un DataFrame indexé par colonne, avec les colonnes 'lower' et 'upper'.
+    """
+    quartiles = df[columns].quantile([0.25, 0.75])
+    q1, q3 = quartiles.loc[0.25], quartiles.loc[0.75]
+    iqr = q3 - q1
+    return pd.DataFrame({'lower': q1 - iqr_multiplier * iqr, 'upper': q3 + iqr_multiplier * iqr})
+
+
+def outlier_masks(df, bounds):
+    """Masque booléen (une colonne par variable) des valeurs hors bornes ; les valeurs manquantes ne sont pas aberrantes."""
+    block = df[bounds.index]
+    masks = block.lt(bounds['lower'], axis=1) | block.gt(bounds['upper'], axis=1)
+    return masks.fillna(False).astype(bool)
+
+
+def apply_outlier_strategy(df, bounds, outlier_strategy, cleaning_log):
+    """
+    Applique la stratégie de traitement des valeurs aberrantes à partir de bornes
+    déjà calculées, en une seule opération sur le DataFrame :
+
+    - 'flag' : ajoute une colonne booléenne `<colonne>_outlier` par variable concernée ;
+    - 'cap' : ramène les valeurs hors bornes sur la borne la plus proche (winsorisation) ;
+    - 'remove' : supprime en une fois toute ligne ayant au moins une valeur hors bornes.
+
+    Toutes les bornes et tous les masques sont calculés sur le même DataFrame,
+    avant toute modification : le résultat ne dépend pas de l'ordre des colonnes
+    (auparavant, avec 'remove', les bornes des dernières colonnes étaient
+    calculées sur un DataFrame déjà filtré par les premières).
+    """
+    masks = outlier_masks(df, bounds)
+    counts = masks.sum()
+    affected = counts[counts > 0].index
+    if affected.empty:
+        return df
+
+    if outlier_strategy == 'flag':
+        df = df.assign(**{f'{column}{OUTLIER_FLAG_SUFFIX}': masks[column] for column in affected})
+        for column in affected:
+            cleaning_log.append(f"INFO: {counts[column]} valeurs aberrantes détectées et signalées dans '{column}'.")
+    elif outlier_strategy == 'remove':
+        df = df[~masks[affected].any(axis=1)]
+        for column in affected:
+            cleaning_log.append(f"IMPORTANT: {counts[column]} lignes contenant des valeurs aberrantes pour '{column}' ont été supprimées.")
+    elif outlier_strategy == 'cap':
+        # Passage en float : les bornes IQR ne sont en général pas entières
+        df[affected] = df[affected].astype('float64').clip(
+            lower=bounds.loc[affected, 'lower'], upper=bounds.loc[affected, 'upper'], axis=1)
+        for column in affected:
+            cleaning_log.append(f"INFO: {counts[column]} valeurs aberrantes pour '{column}' ont été plafonnées (winsorized).")
+    return df
@@ -0,0 +1,433 @@
+"""
+Nettoyage hors mémoire (out-of-core) : le fichier est parcouru deux fois par blocs,
+sans jamais être chargé en entier.
+
+- Passe 1 : statistiques globales (nuls par colonne, votes de type, échantillon
+  des valeurs numériques pour les quartiles et la médiane, fréquences pour le mode)
+  et repérage des doublons par hash des lignes.
+- Passe 2 : application des transformations bloc par bloc et écriture en Parquet.
+
+Les étapes et le journal sont ceux de `clean_data`, avec des approximations :
+
+- doublons : hash 64 bits par ligne (8 octets par ligne unique en mémoire) ;
+  une collision, très improbable, ferait supprimer une ligne à tort ;
+- CSV : lus en texte, les types étant décidés globalement ; '1' et '1.0' ne sont
+  donc pas des doublons, contrairement à une lecture typée ; le journal des
+  conversions part néanmoins des types que `sniff_csv` aurait imposés ;
+- types : un type est adopté si les blocs qui le votent couvrent plus de 80% des
+  valeurs non nulles ; les valeurs non convertibles deviennent manquantes ;
+- quartiles et médianes : estimés sur un échantillon aléatoire de
+  `QUANTILE_SAMPLE_SIZE` valeurs par colonne (exacts en dessous) ; avec 'remove',
+  la médiane ignore les outliers de la colonne mais pas les lignes retirées
+  pour une autre colonne ;
+- modes : fréquences des `MODE_TRACKED_VALUES` valeurs les plus courantes.
+"""
+
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from backend.datacleaning import normalize_text_block, standardize_column_names
+from backend.dedup import ChunkedDeduplicator
+from backend.imputation import log_imputation
+from backend.ingestion import ARROW_EXTENSIONS, CSV_CHUNK_ROWS, FRENCH_DECIMAL_PATTERN, get_file_size, open_compressed, sniff_csv
+from backend.outliers import OUTLIER_FLAG_SUFFIX, outlier_masks
+from backend.sampling import ReservoirSampler
+from backend.typeinference import BOOL_MAP, CONVERSION_THRESHOLD, as_text, infer_column, narrowest_integer_dtype
+
+
+# Valeurs conservées par colonne pour estimer quartiles et médiane
+QUANTILE_SAMPLE_SIZE = 50_000
+# Valeurs distinctes suivies par colonne pour le mode (les plus rares sont oubliées)
+MODE_TRACKED_VALUES = 10_000
+# Plus grand entier représenté exactement en float32
+FLOAT32_EXACT_INT = 2 ** 24
+
+
+def iter_file_chunks(path, chunksize=CSV_CHUNK_ROWS):
+    """
+    Parcourt un fichier bloc par bloc, en renvoyant des couples (bloc, fraction lue).
+
+    Les CSV (éventuellement compressés) sont lus en texte avec les paramètres de
+    `sniff_csv` ; les décimales à la française sont réécrites avec un point.
+    Parquet est lu par lots de lignes, Feather et Arrow IPC par lots d'enregistrement.
+    """
+    name = os.fspath(path)
+    if name.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(name)
+        total_rows = parquet_file.metadata.num_rows or 1
+        rows_read = 0
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            rows_read += batch.num_rows
+            yield batch.to_pandas(types_mapper=pd.ArrowDtype), rows_read / total_rows
+        return
+    if name.endswith(ARROW_EXTENSIONS):
+        import pyarrow as pa
+        with pa.memory_map(name, 'r') as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i).to_pandas(types_mapper=pd.ArrowDtype), (i + 1) / reader.num_record_batches
+        return
+
+    with open(name, 'rb') as raw:
+        source = open_compressed(raw)
+        if not source.name.endswith('.csv'):
+            raise ValueError("Format non supporté hors mémoire. Utilisez CSV, Parquet, Feather ou Arrow.")
+        read_kwargs = sniff_csv(source)
+        total_size = get_file_size(source) or 1
+        # Tout est lu en texte : les types sont décidés sur l'ensemble du fichier
+        with pd.read_csv(source, chunksize=chunksize, dtype=str, encoding=read_kwargs['encoding'],
+                         encoding_errors='replace', sep=read_kwargs['sep'],
+                         usecols=read_kwargs['usecols']) as reader:
+            for chunk in reader:
+                if read_kwargs['decimal'] != '.':
+                    _canonical_decimals(chunk)
+                yield chunk, min(source.tell() / total_size, 1.0)
+
+
+def loaded_dtypes(path):
+    """
+    Types qu'aurait chaque colonne d'un CSV chargé en mémoire par `load_file`
+    (ceux que `sniff_csv` impose, dates analysées comprises), sous les noms
+    standardisés ; un dictionnaire vide pour les formats Arrow, dont les blocs
+    ont déjà ces types. Sert au journal des conversions, identique à celui de `clean_data`.
+    """
+    name = os.fspath(path)
+    if name.endswith(ARROW_EXTENSIONS):
+        return {}
+    with open(name, 'rb') as raw:
+        read_kwargs = sniff_csv(open_compressed(raw))
+    dtypes = {col: pd.api.types.pandas_dtype(dtype) for col, dtype in read_kwargs['dtype'].items()}
+    dtypes.update({col: np.dtype('datetime64[ns]') for col in read_kwargs.get('parse_dates', [])})
+    return {new: dtypes[old] for old, new in zip(dtypes, standardize_column_names(pd.Index(list(dtypes))))}
+
+
+def _canonical_decimals(chunk):
+    """Réécrit '1 234,5' en '1234.5' dans les colonnes texte d'un CSV à la française."""
+    for col in chunk.columns:
+        values = chunk[col]
+        french = values.str.match(FRENCH_DECIMAL_PATTERN.pattern, na=False)
+        if french.any():
+            chunk.loc[french, col] = (values[french]
+                                      .str.replace(r'[ \u00a0]', '', regex=True)
+                                      .str.replace(',', '.', regex=False))
+
+
+class ColumnStats:
+    """Statistiques d'une colonne accumulées pendant la passe 1, puis décision de type."""
+
+    def __init__(self, original_dtype):
+        self.original_dtype = original_dtype
+        self.votes = Counter()
+        self.date_formats = Counter()
+        self.float32_exact = True
+        self.minimum = None
+        self.maximum = None
+        self.sampler = ReservoirSampler(size=QUANTILE_SAMPLE_SIZE)
+        self.counts = None
+        self.kind = None
+        self.dtype = None
+        self.date_format = None
+
+    def update(self, series):
+        non_null = int(series.notna().sum())
+        if not non_null:
+            return
+        converted, kind, date_format = infer_column(series)
+        self.votes[kind] += non_null
+        if date_format is not None:
+            self.date_formats[date_format] += non_null
+        if kind in ('integer', 'float'):
+            values = converted.dropna().astype('float64')
+            self.sampler.add(values.to_frame('valeur'))
+            low, high = values.min(), values.max()
+            self.minimum = low if self.minimum is None else min(self.minimum, low)
+            self.maximum = high if self.maximum is None else max(self.maximum, high)
+            if kind == 'float' and converted.dtype != np.float32:
+                self.float32_exact = False
+        else:
+            counts = series.value_counts()
+            self.counts = counts if self.counts is None else self.counts.add(counts, fill_value=0)
+            if len(self.counts) > 2 * MODE_TRACKED_VALUES:
+                self.counts = self.counts.nlargest(MODE_TRACKED_VALUES)
+
+    def decide(self):
+        """Type final : celui dont les blocs couvrent plus de 80% des valeurs non nulles."""
+        total = sum(self.votes.values())
+        numeric = self.votes['integer'] + self.votes['float']
+        if not total:
+            return
+        if numeric > CONVERSION_THRESHOLD * total:
+            if self.votes['float'] == 0:
+                self.kind = 'integer'
+                self.dtype = narrowest_integer_dtype(pd.Series([self.minimum, self.maximum]))
+            else:
+                self.kind = 'float'
+                exact = self.float32_exact and max(abs(self.minimum), abs(self.maximum)) <= FLOAT32_EXACT_INT
+                self.dtype = 'float32' if exact else 'float64'
+        elif self.votes['datetime'] > CONVERSION_THRESHOLD * total:
+            self.kind = 'datetime'
+            self.date_format = self.date_formats.most_common(1)[0][0]
+        elif self.votes['boolean'] > CONVERSION_THRESHOLD * total:
+            self.kind = 'boolean'
+            self.dtype = 'boolean'
+
+    def convert(self, series):
+        """Conversion d'un bloc vers le type décidé ; les valeurs non convertibles deviennent manquantes."""
+        if self.kind in ('integer', 'float'):
+            values = series if pd.api.types.is_numeric_dtype(series.dtype) else pd.to_numeric(as_text(series), errors='coerce')
+            values = values.astype('float64')
+            if self.kind == 'integer':
+                info = np.iinfo(self.dtype.lower())
+                values = values.where((values % 1 == 0) & values.between(info.min, info.max))
+            return values.astype(self.dtype)
+        if self.kind == 'datetime':
+            return pd.to_datetime(series, format=self.date_format, errors='coerce')
+        if self.kind == 'boolean':
+            return series.astype(str).str.lower().map(BOOL_MAP).astype('boolean')
+        return series
+
+    def quartiles(self):
+        sample = self.sampler.sample
+        if sample is None:
+            return np.nan, np.nan
+        return tuple(sample['valeur'].quantile([0.25, 0.75]))
+
+    def fill_value(self, bounds=None, outlier_strategy='none'):
+        """
+        Médiane (numériques) ou mode, converti vers le type final. Avec des bornes
+        d'outliers, la médiane est prise sur l'échantillon plafonné ('cap') ou
+        privé des valeurs hors bornes ('remove'), comme après l'étape 7.
+        """
+        if self.kind in ('integer', 'float'):
+            sample = self.sampler.sample
+            if sample is None:
+                return np.nan
+            values = sample['valeur']
+            if bounds is not None and outlier_strategy == 'cap':
+                values = values.clip(bounds['lower'], bounds['upper'])
+            elif bounds is not None and outlier_strategy == 'remove':
+                values = values[values.between(bounds['lower'], bounds['upper'])]
+            median = values.median()
+            return int(round(median)) if self.kind == 'integer' else median
+        if self.counts is None or self.counts.empty:
+            return np.nan
+        # Comme `mode()` : en cas d'égalité, la plus petite valeur
+        top = self.counts[self.counts == self.counts.max()].index
+        try:
+            value = min(top)
+        except TypeError:
+            value = min(top, key=str)
+        return self.convert(pd.Series([value])).iloc[0]
+
+
+def _prepare_chunk(chunk):
+    """Étapes 2 et 3 sur un bloc (déjà privé de ses lignes vides) : noms de colonnes, textes et nuls."""
+    chunk.columns = standardize_column_names(chunk.columns)
+    text_cols = chunk.select_dtypes(include=['object', 'string']).columns
+    # Colonnes sans valeur dans ce bloc (dont le type Arrow null) : rien à nettoyer,
+    # et l'accesseur .str les refuse
+    text_cols = text_cols[chunk[text_cols].notna().any().to_numpy()]
+    if not text_cols.empty:
+        for col, values in normalize_text_block(chunk[text_cols]).items():
+            chunk[col] = values
+    return chunk
+
+
+def _arrow_schema(chunk):
+    """Schéma Parquet du résultat ; les colonnes texte sont déclarées en chaînes même si le premier bloc est vide."""
+    import pyarrow as pa
+    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+    for i, field in enumerate(schema):
+        if chunk[field.name].dtype == object:
+            schema = schema.set(i, pa.field(field.name, pa.string()))
+    return schema
+
+
+def clean_file_out_of_core(path, output_path,
+                           missing_value_strategy='auto',
+                           missing_col_threshold=0.8,
+                           outlier_strategy='flag',
+                           outlier_method='iqr',
+                           iqr_multiplier=1.5,
+                           dedup_subset=None,
+                           chunksize=CSV_CHUNK_ROWS,
+                           progress_callback=None):
+    """
+    Nettoie un fichier (CSV, Parquet, Feather, Arrow) plus grand que la mémoire
+    et écrit le résultat en Parquet dans `output_path`. Mêmes options et même
+    journal que `clean_data` (dont `dedup_subset`, exprimé avec les noms de
+    colonnes standardisés) ; voir l'en-tête du module pour les approximations.
+    `progress_callback(fraction, lignes_lues)` suit l'avancement des deux passes.
+    Retourne `(output_path, cleaning_log)`.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    cleaning_log = []
+
+    # --- Passe 1 : statistiques globales ---
+    raw_columns = None
+    raw_nulls = None
+    rows_in = rows_nonempty = rows_unique = 0
+    null_counts = None
+    stats = {}
+    deduplicator = ChunkedDeduplicator(dedup_subset)
+    keep_masks = []
+    for chunk, fraction in iter_file_chunks(path, chunksize):
+        rows_in += len(chunk)
+        if raw_columns is None:
+            raw_columns = chunk.columns.tolist()
+        chunk = chunk.dropna(how='all')
+        rows_nonempty += len(chunk)
+        nulls = chunk.isna().sum()
+        raw_nulls = nulls if raw_nulls is None else raw_nulls + nulls
+
+        chunk = _prepare_chunk(chunk)
+        # Doublons repérés par hash des lignes ; le masque sert à nouveau en passe 2
+        keep = deduplicator.keep_mask(chunk)
+        keep_masks.append(np.packbits(keep))
+        chunk = chunk[keep]
+        rows_unique += len(chunk)
+        nulls = chunk.isna().sum()
+        null_counts = nulls if null_counts is None else null_counts + nulls
+        for col in chunk.columns:
+            if col not in stats:
+                stats[col] = ColumnStats(chunk[col].dtype)
+            stats[col].update(chunk[col])
+        if progress_callback is not None:
+            progress_callback(fraction / 2, rows_in)
+    del deduplicator
+
+    if not rows_nonempty:
+        return None, ["Le DataFrame initial est vide."]
+
+    # --- 1. Lignes et colonnes entièrement vides ---
+    empty_cols = raw_nulls[raw_nulls == rows_nonempty].index
+    initial_shape = (rows_in, len(raw_columns))
+    shape_after_drop_all = (rows_nonempty, len(raw_columns) - len(empty_cols))
+    if initial_shape != shape_after_drop_all:
+        cleaning_log.append(f"INFO: Suppression des lignes/colonnes entièrement vides. Taille passée de {initial_shape} à {shape_after_drop_all}.")
+    # --- 2. Noms de colonnes ---
+    new_columns = standardize_column_names(pd.Index(raw_columns)).tolist()
+    renamed_cols = {o: n for o, n in zip(raw_columns, new_columns) if o != n and o not in empty_cols}
+    if renamed_cols:
+        cleaning_log.append(f"INFO: {len(renamed_cols)} noms de colonnes ont été standardisés (ex: '{list(renamed_cols.keys())[0]}' -> '{list(renamed_cols.values())[0]}').")
+    # --- 3. Textes ---
+    cleaning_log.append(f"INFO: Nettoyage des espaces et standardisation des valeurs textuelles vides en NaN.")
+    # --- 4. Doublons ---
+    duplicates_removed = rows_nonempty - rows_unique
+    if duplicates_removed > 0:
+        cleaning_log.append(f"IMPORTANT: {duplicates_removed} ligne(s) en double ont été supprimée(s).")
+    # --- 5. Colonnes fortement vides (les colonnes entièrement vides en font partie) ---
+    missing_ratios = null_counts / rows_unique
+    cols_to_drop = missing_ratios[missing_ratios > missing_col_threshold].index
+    empty_renamed = [standardize_column_names(pd.Index([col]))[0] for col in empty_cols]
+    sparse_cols = [col for col in cols_to_drop if col not in empty_renamed]
+    if sparse_cols:
+        cleaning_log.append(f"AVERTISSEMENT: {len(sparse_cols)} colonnes ({', '.join(sparse_cols)}) supprimées car plus de {missing_col_threshold:.0%} de valeurs sont manquantes.")
+    kept_cols = [col for col in null_counts.index if col not in set(cols_to_drop)]
+    # --- 6. Types ---
+    for col in kept_cols:
+        stats[col].decide()
+
+    # Bornes IQR et valeurs de remplacement, à partir des statistiques de la passe 1
+    numeric_cols = [col for col in kept_cols if stats[col].kind in ('integer', 'float')]
+    bounds = pd.DataFrame(columns=['lower', 'upper'], dtype='float64')
+    if outlier_strategy != 'none' and outlier_method == 'iqr' and numeric_cols:
+        quartiles = pd.DataFrame([stats[col].quartiles() for col in numeric_cols],
+                                 index=numeric_cols, columns=['q1', 'q3'])
+        iqr = quartiles['q3'] - quartiles['q1']
+        bounds = pd.DataFrame({'lower': quartiles['q1'] - iqr_multiplier * iqr,
+                               'upper': quartiles['q3'] + iqr_multiplier * iqr})
+        # Seules les colonnes ayant au moins une valeur hors bornes sont traitées (schéma fixe)
+        minima = pd.Series({col: stats[col].minimum for col in numeric_cols})
+        maxima = pd.Series({col: stats[col].maximum for col in numeric_cols})
+        bounds = bounds[(minima < bounds['lower']) | (maxima > bounds['upper'])]
+    fill_values = {}
+    if missing_value_strategy == 'auto':
+        fill_values = {col: stats[col].fill_value(bounds.loc[col] if col in bounds.index else None, outlier_strategy)
+                       for col in kept_cols}
+        fill_values = {col: value for col, value in fill_values.items() if not pd.isna(value)}
+
+    # --- Passe 2 : transformations et écriture ---
+    outlier_counts = pd.Series(0, index=bounds.index, dtype='int64')
+    filled_counts = pd.Series(0, index=kept_cols, dtype='int64')
+    removed_null_cols = set()
+    original_types = final_types = None
+    rows_out = 0
+    n_columns_out = len(kept_cols)
+    writer = None
+    try:
+        for chunk_number, (chunk, fraction) in enumerate(iter_file_chunks(path, chunksize)):
+            chunk = _prepare_chunk(chunk.dropna(how='all'))
+            keep = np.unpackbits(keep_masks[chunk_number], count=len(chunk)).astype(bool)
+            chunk = chunk.loc[keep, kept_cols]
+            if original_types is None:
+                # Les CSV sont lus en texte : types d'origine tels que les verrait `clean_data`
+                original_types = {**chunk.dtypes.to_dict(), **loaded_dtypes(path)}
+            for col in kept_cols:
+                converted = stats[col].convert(chunk[col])
+                if converted.dtype != chunk[col].dtype:
+                    chunk[col] = converted
+            if final_types is None:
+                final_types = chunk.dtypes.to_dict()
+
+            # --- 7. Valeurs aberrantes, avec les bornes globales ---
+            if not bounds.empty:
+                masks = outlier_masks(chunk, bounds)
+                outlier_counts += masks.sum()
+                affected = bounds.index
+                if outlier_strategy == 'flag':
+                    chunk = chunk.assign(**{f'{column}{OUTLIER_FLAG_SUFFIX}': masks[column] for column in affected})
+                elif outlier_strategy == 'remove':
+                    chunk = chunk[~masks.any(axis=1)]
+                elif outlier_strategy == 'cap':
+                    chunk[affected] = chunk[affected].astype('float64').clip(
+                        lower=bounds['lower'], upper=bounds['upper'], axis=1)
+
+            # --- 8. Valeurs manquantes, avec les médianes et modes globaux ---
+            if missing_value_strategy == 'remove_row':
+                null_mask = chunk.isna().to_numpy()
+                rows_with_nulls = null_mask.any(axis=1)
+                removed_null_cols.update(chunk.columns[np.unique(null_mask[rows_with_nulls].argmax(axis=1))])
+                chunk = chunk[~rows_with_nulls]
+            elif missing_value_strategy == 'auto':
+                filled_counts += chunk[kept_cols].isna().sum()
+                chunk = chunk.fillna(fill_values)
+
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, _arrow_schema(chunk))
+                n_columns_out = chunk.shape[1]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False))
+            rows_out += len(chunk)
+            if progress_callback is not None:
+                progress_callback(0.5 + fraction / 2, rows_out)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    types_changed = {k: f"{original_types[k]} -> {final_types[k]}" for k in final_types if str(original_types.get(k)) != str(final_types[k])}
+    if types_changed:
+        cleaning_log.append(f"INFO: {len(types_changed)} types de colonnes ont été convertis (ex: '{list(types_changed.keys())[0]}' de {list(types_changed.values())[0]}).")
+    for column, count in outlier_counts[outlier_counts > 0].items():
+        if outlier_strategy == 'flag':
+            cleaning_log.append(f"INFO: {count} valeurs aberrantes détectées et signalées dans '{column}'.")
+        elif outlier_strategy == 'remove':
+            cleaning_log.append(f"IMPORTANT: {count} lignes contenant des valeurs aberrantes pour '{column}' ont été supprimées.")
+        elif outlier_strategy == 'cap':
+            cleaning_log.append(f"INFO: {count} valeurs aberrantes pour '{column}' ont été plafonnées (winsorized).")
+    if missing_value_strategy == 'remove_row':
+        for col in kept_cols:
+            if col in removed_null_cols:
+                cleaning_log.append(f"INFO: Lignes avec valeurs manquantes pour '{col}' supprimées.")
+    elif missing_value_strategy == 'auto':
+        for col in kept_cols:
+            if filled_counts[col] > 0 and col in fill_values:
+                log_imputation(col, final_types[col], fill_values[col], cleaning_log)
+
+    cleaning_log.append(f"SUCCÈS: Nettoyage terminé. Taille finale du DataFrame : {(rows_out, n_columns_out)}.")
+    return output_path, cleaning_log
@@ -0,0 +1,150 @@
+import os
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+# En dessous de ces tailles, le coût du pool de processus dépasse le gain
+PARALLEL_MIN_COLUMNS = 32
+PARALLEL_MIN_CELLS = 1_000_000
+# Nombre de blocs de colonnes par processus (équilibrage de charge)
+BLOCKS_PER_WORKER = 4
+
+
+def resolve_n_jobs(n_jobs):
+    """Nombre de processus : `n_jobs` < 0 compte à partir du nombre de cœurs (-1 = tous)."""
+    if not n_jobs:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+
+def should_parallelize(df, columns, pool):
+    """Vrai si le travail sur `columns` justifie l'envoi au pool de processus."""
+    return (pool is not None and len(columns) >= PARALLEL_MIN_COLUMNS
+            and len(df) * len(columns) >= PARALLEL_MIN_CELLS)
+
+
+def column_blocks(columns, n_blocks):
+    """Découpe `columns` en au plus `n_blocks` blocs contigus, dans l'ordre d'origine."""
+    columns = list(columns)
+    n_blocks = max(1, min(n_blocks, len(columns)))
+    size, extra = divmod(len(columns), n_blocks)
+    blocks, start = [], 0
+    for i in range(n_blocks):
+        end = start + size + (1 if i < extra else 0)
+        blocks.append(columns[start:end])
+        start = end
+    return blocks
+
+
+def _is_shareable(dtype):
+    # Seuls les types NumPy numériques ont une représentation mémoire brute partageable
+    return isinstance(dtype, np.dtype) and dtype.kind in 'biuf'
+
+
+class SharedFrame:
+    """
+    Colonnes numériques NumPy d'un DataFrame copiées en mémoire partagée (un
+    segment par type, une ligne du segment par colonne) : les processus de
+    calcul les lisent directement, sans sérialisation. Les autres colonnes
+    (texte, types nullables, dates...) sont transmises par pickle.
+
+    S'utilise comme gestionnaire de contexte, qui libère les segments en sortie.
+    """
+
+    def __init__(self, df, columns):
+        self.df = df
+        self.segments = []
+        self.descriptors = {}
+        groups = {}
+        for col in columns:
+            if _is_shareable(df[col].dtype):
+                groups.setdefault(df[col].dtype.str, []).append(col)
+        for dtype_str, cols in groups.items():
+            shape = (len(cols), len(df))
+            segment = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype_str).itemsize))
+            self.segments.append(segment)
+            array = np.ndarray(shape, dtype=dtype_str, buffer=segment.buf)
+            for position, col in enumerate(cols):
+                array[position] = df[col].to_numpy()
+            del array
+            self.descriptors[dtype_str] = (segment.name, shape, {col: position for position, col in enumerate(cols)})
+
+    def payload(self, columns):
+        """Description picklable d'un bloc de colonnes, à passer à `run_on_block`."""
+        shared = {}
+        for dtype_str, (name, shape, positions) in self.descriptors.items():
+            wanted = [(col, positions[col]) for col in columns if col in positions]
+            if wanted:
+                shared[dtype_str] = (name, shape, wanted)
+        shared_cols = {col for _, _, wanted in shared.values() for col, _ in wanted}
+        others = self.df[[col for col in columns if col not in shared_cols]]
+        return {'columns': list(columns), 'index': self.df.index, 'shared': shared, 'others': others}
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+            segment.unlink()
+        self.segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach_segment(name):
+    """Ouvre un segment créé par le processus principal, sans en devenir responsable."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Avant Python 3.13, l'ouverture enregistre le segment auprès du resource_tracker,
+    # qui le détruirait (ou signalerait une fuite) à la sortie du processus de calcul
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def run_on_block(func, payload, *args):
+    """
+    Exécuté dans un processus de calcul : reconstruit le bloc de colonnes à partir
+    de la mémoire partagée et du pickle, puis renvoie `func(bloc, *args)`.
+    Le résultat ne doit pas référencer la mémoire partagée (il est sérialisé au retour).
+    """
+    segments, data = [], {}
+    try:
+        for dtype_str, (name, shape, wanted) in payload['shared'].items():
+            segment = _attach_segment(name)
+            segments.append(segment)
+            array = np.ndarray(shape, dtype=dtype_str, buffer=segment.buf)
+            for col, position in wanted:
+                data[col] = pd.Series(array[position], index=payload['index'], name=col, copy=False)
+        for col in payload['others'].columns:
+            data[col] = payload['others'][col]
+        block = pd.DataFrame({col: data[col] for col in payload['columns']}, copy=False)
+        return func(block, *args)
+    finally:
+        data = block = array = None
+        for segment in segments:
+            try:
+                segment.close()
+            except BufferError:
+                # Une vue subsiste encore : le segment sera libéré à la fin du processus
+                pass
+
+
+def map_blocks(pool, n_jobs, func, df, columns, *args):
+    """
+    Applique `func(bloc, *args)` à des blocs de colonnes de `df` sur le pool de
+    processus. Les résultats sont renvoyés dans l'ordre des blocs, donc des colonnes.
+    """
+    blocks = column_blocks(columns, n_jobs * BLOCKS_PER_WORKER)
+    with SharedFrame(df, columns) as shared:
+        futures = [pool.submit(run_on_block, func, shared.payload(block), *args) for block in blocks]
+        return [future.result() for future in futures]
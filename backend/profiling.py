@@ -0,0 +1,118 @@
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+MB = 1024 * 1024
+MEMORY_REPORT_COLUMNS = ['etape', 'pic_mo', 'apres_mo', 'cache']
+PROFILE_REPORT_COLUMNS = ['etape', 'duree_s', 'cpu_s', 'pic_mo', 'apres_mo',
+                          'lignes_entree', 'colonnes_entree', 'lignes_sortie', 'colonnes_sortie', 'cache']
+
+# tracemalloc est global au processus : il est démarré par le premier profileur actif
+# (s'il ne l'était pas déjà) et arrêté au départ du dernier, jamais sous une autre session
+_tracing_lock = threading.Lock()
+_active_recorders = 0
+_started_tracing = False
+
+
+class _StageShapes:
+    """Dimensions d'entrée et de sortie d'une étape (la sortie vaut l'entrée si elle n'est pas fournie)."""
+
+    def __init__(self, df):
+        self.shape_in = df.shape if df is not None else (None, None)
+        self.shape_out = self.shape_in
+
+    def output(self, df):
+        """Note le DataFrame produit par l'étape."""
+        self.shape_out = df.shape
+
+
+class StageRecorder:
+    """
+    Mesures par étape du nettoyage, sans aucun coût quand elles sont désactivées.
+
+    Mémoire (`memory=True`) : allocations Python et NumPy suivies par tracemalloc
+    depuis le début du nettoyage, donc hors données d'entrée. 'pic_mo' est le
+    maximum atteint pendant l'étape, 'apres_mo' ce qui reste alloué à sa fin ;
+    une étape reprise du cache est marquée dans la colonne 'cache'.
+
+    Profil complet (`profile=True`, qui inclut la mémoire) : durée réelle
+    ('duree_s'), temps CPU du processus principal ('cpu_s', hors processus du
+    pool) et dimensions des données en entrée et en sortie de chaque étape.
+    tracemalloc ralentit les allocations : les durées servent à comparer les
+    étapes entre elles plus qu'à chronométrer un nettoyage sans profil.
+
+    Les mesures mémoire portent sur tout le processus : si plusieurs sessions
+    Streamlit nettoient en même temps, leurs allocations s'additionnent dans
+    les pics et les volumes restants de chacune.
+
+    S'utilise comme gestionnaire de contexte autour du nettoyage complet.
+    """
+
+    def __init__(self, memory=False, profile=False):
+        self.profile = profile
+        self.memory = memory or profile
+        self.rows = []
+        self._baseline = 0
+
+    def __enter__(self):
+        global _active_recorders, _started_tracing
+        if self.memory:
+            with _tracing_lock:
+                if _active_recorders == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    _started_tracing = True
+                _active_recorders += 1
+            self._baseline = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc):
+        global _active_recorders, _started_tracing
+        if self.memory:
+            with _tracing_lock:
+                _active_recorders -= 1
+                if _active_recorders == 0 and _started_tracing:
+                    tracemalloc.stop()
+                    _started_tracing = False
+
+    @contextmanager
+    def stage(self, name, df=None):
+        """
+        Mesure le bloc de code d'une étape appliquée à `df`. L'objet renvoyé
+        reçoit le résultat par `output(df)` lorsque l'étape remplace le DataFrame.
+        """
+        shapes = _StageShapes(df)
+        if not self.memory:
+            yield shapes
+            return
+        tracemalloc.reset_peak()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        yield shapes
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        current, peak = tracemalloc.get_traced_memory()
+        self._record(name, peak, current, False, wall, cpu, shapes)
+
+    def cached(self, name, df_in=None, df_out=None):
+        """Note une étape reprise du cache (aucun calcul, aucune allocation notable)."""
+        if self.memory:
+            shapes = _StageShapes(df_in)
+            if df_out is not None:
+                shapes.output(df_out)
+            current = tracemalloc.get_traced_memory()[0]
+            self._record(name, current, current, True, 0.0, 0.0, shapes)
+
+    def _record(self, name, peak, current, cached, wall, cpu, shapes):
+        row = {'etape': name, 'pic_mo': (peak - self._baseline) / MB,
+               'apres_mo': (current - self._baseline) / MB, 'cache': cached}
+        if self.profile:
+            row.update(duree_s=wall, cpu_s=cpu,
+                       lignes_entree=shapes.shape_in[0], colonnes_entree=shapes.shape_in[1],
+                       lignes_sortie=shapes.shape_out[0], colonnes_sortie=shapes.shape_out[1])
+        self.rows.append(row)
+
+    def report(self):
+        """Tableau des mesures, une ligne par étape."""
+        columns = PROFILE_REPORT_COLUMNS if self.profile else MEMORY_REPORT_COLUMNS
+        return pd.DataFrame(self.rows, columns=columns)
@@ -0,0 +1,193 @@
+"""
+Recettes de nettoyage : description JSON des décisions prises par `clean_data`
+(renommages, colonnes supprimées, types inférés, bornes IQR, valeurs
+d'imputation, options), et rejeu de ces décisions sur un nouveau fichier de
+même structure.
+
+Le rejeu ne recalcule aucune statistique : pas d'échantillonnage ni de
+détection de format pour les types, pas de quartiles pour les bornes, pas de
+médianes ni de modes (sauf pour une colonne qui n'avait pas de valeur manquante
+lors du nettoyage d'origine). Restent les opérations ligne à ligne : textes,
+doublons, conversions, masques et remplissages.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from backend.datacleaning import CLEANING_RECIPE_ATTR, encode_text
+from backend.dedup import duplicate_mask
+from backend.imputation import compute_imputation_values, impute_missing_values
+from backend.optimization import optimize_memory
+from backend.outliers import apply_outlier_strategy
+from backend.typeinference import BOOL_MAP, DATETIME_FORMATS_ATTR, as_text, narrowest_integer_dtype, take_codes
+
+# Version du format JSON, vérifiée au chargement
+RECIPE_VERSION = 1
+
+
+def get_recipe(df):
+    """Recette déposée par `clean_data` sur un DataFrame nettoyé, ou None."""
+    return df.attrs.get(CLEANING_RECIPE_ATTR)
+
+
+def recipe_to_json(recipe):
+    """Recette sérialisée en JSON (lisible, accents conservés)."""
+    return json.dumps({'version': RECIPE_VERSION, **recipe}, ensure_ascii=False, indent=2)
+
+
+def recipe_from_json(text):
+    """Recette relue depuis son JSON ; ValueError si le contenu n'est pas une recette de ce format."""
+    try:
+        recipe = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Recette illisible : {e}") from e
+    if not isinstance(recipe, dict) or recipe.get('version') != RECIPE_VERSION:
+        raise ValueError("Ce fichier n'est pas une recette de nettoyage reconnue.")
+    return recipe
+
+
+def _convert_values(values, spec):
+    """Conversion vers le type noté dans la recette ; les valeurs non convertibles deviennent manquantes."""
+    kind = spec['kind']
+    if kind in ('integer', 'float'):
+        if not pd.api.types.is_numeric_dtype(values.dtype) or pd.api.types.is_bool_dtype(values.dtype):
+            values = pd.to_numeric(as_text(values), errors='coerce')
+        if kind == 'float':
+            values = values.astype('float64')
+            narrowed = values.astype(np.float32)
+            # float32 seulement s'il reste exact sur les nouvelles valeurs
+            exact = spec['dtype'] == 'float32' and np.array_equal(narrowed.to_numpy(), values.to_numpy(), equal_nan=True)
+            return narrowed if exact else values
+        if not pd.api.types.is_integer_dtype(values.dtype):
+            values = values.astype('float64')
+            values = values.where(values % 1 == 0)
+        dtype = spec['dtype']
+        non_null = values.dropna()
+        if not non_null.empty:
+            # Type élargi plutôt que des valeurs perdues si le nouveau fichier dépasse l'ancien
+            info = np.iinfo(dtype.lower())
+            if non_null.min() < info.min or non_null.max() > info.max:
+                dtype = narrowest_integer_dtype(non_null)
+        return values.astype(dtype)
+    if kind == 'datetime':
+        return pd.to_datetime(values, format=spec['date_format'], errors='coerce')
+    if kind == 'boolean':
+        return values.astype(str).str.lower().map(BOOL_MAP).astype('boolean')
+    return values
+
+
+def _convert_column(series, spec):
+    """Conversion d'une colonne ; une colonne texte encodée n'est convertie que sur ses catégories."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        converted = _convert_values(pd.Series(series.cat.categories), spec)
+        return take_codes(converted, series.cat.codes.to_numpy(), series)
+    return _convert_values(series, spec)
+
+
+def _fill_values(df, recorded, cleaning_log):
+    """
+    Valeurs d'imputation de la recette, ramenées au type des colonnes. Une colonne
+    sans valeur notée (elle était complète à l'origine) est complétée par une
+    valeur calculée sur les nouvelles données.
+    """
+    null_cols = df.columns[df.isna().any().to_numpy()]
+    values = {}
+    for col in null_cols:
+        if col in recorded:
+            value = recorded[col]
+            if value is not None and pd.api.types.is_datetime64_any_dtype(df[col].dtype):
+                value = pd.Timestamp(value)
+            values[col] = value
+    computed = [col for col in null_cols if col not in recorded]
+    if computed:
+        values.update(compute_imputation_values(df, computed))
+        cleaning_log.append(f"AVERTISSEMENT: {len(computed)} colonne(s) ({', '.join(computed)}) sans valeur d'imputation "
+                            "dans la recette : valeur calculée sur ce fichier.")
+    return values
+
+
+def apply_recipe(df, recipe):
+    """
+    Rejoue une recette de `clean_data` sur `df` et retourne, comme `clean_data`,
+    le DataFrame nettoyé et un journal des opérations.
+
+    Les étapes et leur ordre sont ceux de `clean_data`, mais chaque décision
+    vient de la recette : colonnes retirées, noms, types (les valeurs non
+    convertibles deviennent manquantes), bornes des valeurs aberrantes et
+    valeurs de remplacement. Lève ValueError si les colonnes de `df` ne sont
+    pas celles du fichier d'origine.
+    """
+    missing = [col for col in recipe['columns'] if col not in df.columns]
+    unexpected = [col for col in df.columns if col not in recipe['columns']]
+    if missing or unexpected:
+        details = []
+        if missing:
+            details.append(f"colonnes absentes : {', '.join(map(str, missing))}")
+        if unexpected:
+            details.append(f"colonnes inconnues de la recette : {', '.join(map(str, unexpected))}")
+        raise ValueError(f"Le fichier ne correspond pas à la recette ({' ; '.join(details)}).")
+    if df.empty:
+        return pd.DataFrame(), ["Le DataFrame initial est vide."]
+
+    options = recipe['options']
+    cleaning_log = [f"INFO: Nettoyage rejoué à partir d'une recette ({len(recipe['types'])} types, "
+                    f"{len(recipe.get('outlier_bounds', {}))} bornes, "
+                    f"{len(recipe.get('imputation_values', {}))} valeurs de remplacement)."]
+
+    # --- 1 et 2. Lignes vides, colonnes vides à l'origine et noms ---
+    names = recipe['column_names']
+    initial_shape = df.shape
+    cleaned_df = df.dropna(how='all')[list(names)]
+    if cleaned_df.shape != initial_shape:
+        cleaning_log.append(f"INFO: Suppression des lignes/colonnes entièrement vides. Taille passée de {initial_shape} à {cleaned_df.shape}.")
+    cleaned_df.columns = list(names.values())
+
+    # --- 3. Textes (encodés en catégories jusqu'aux conversions de types) ---
+    text_cols = [col for col in recipe['text_columns']
+                 if pd.api.types.is_object_dtype(cleaned_df[col].dtype) or pd.api.types.is_string_dtype(cleaned_df[col].dtype)]
+    text_dtypes = cleaned_df.dtypes[text_cols].to_dict()
+    for col in text_cols:
+        cleaned_df[col] = encode_text(cleaned_df[col])
+
+    # --- 4. Doublons ---
+    duplicates = duplicate_mask(cleaned_df, recipe['dedup_columns'])
+    if duplicates.any():
+        cleaned_df = cleaned_df[~duplicates]
+        key_text = f" (clé : {', '.join(recipe['dedup_columns'])})" if recipe['dedup_columns'] else ""
+        cleaning_log.append(f"IMPORTANT: {int(duplicates.sum())} ligne(s) en double ont été supprimée(s){key_text}.")
+
+    # --- 5. Colonnes supprimées à l'origine ---
+    if recipe['dropped_columns']:
+        cleaned_df = cleaned_df.drop(columns=recipe['dropped_columns'])
+        cleaning_log.append(f"AVERTISSEMENT: {len(recipe['dropped_columns'])} colonnes ({', '.join(recipe['dropped_columns'])}) supprimées selon la recette.")
+
+    # --- 6. Types ---
+    for col, spec in recipe['types'].items():
+        cleaned_df[col] = _convert_column(cleaned_df[col], spec)
+    for col, text_dtype in text_dtypes.items():
+        if col in cleaned_df.columns and isinstance(cleaned_df[col].dtype, pd.CategoricalDtype):
+            cleaned_df[col] = cleaned_df[col].astype(text_dtype)
+    cleaned_df.attrs[DATETIME_FORMATS_ATTR] = {col: spec['date_format'] for col, spec in recipe['types'].items()
+                                               if spec['kind'] == 'datetime'}
+
+    # --- 7. Valeurs aberrantes, avec les bornes d'origine ---
+    bounds = pd.DataFrame.from_dict(recipe.get('outlier_bounds', {}), orient='index',
+                                    columns=['lower', 'upper'], dtype='float64')
+    bounds = bounds[bounds.index.isin(cleaned_df.select_dtypes(include=np.number).columns)]
+    if options['outlier_strategy'] != 'none' and not bounds.empty:
+        cleaned_df = apply_outlier_strategy(cleaned_df, bounds, options['outlier_strategy'], cleaning_log)
+
+    # --- 8. Valeurs manquantes, avec les valeurs de remplacement d'origine ---
+    strategy = options['missing_value_strategy']
+    values = _fill_values(cleaned_df, recipe.get('imputation_values', {}), cleaning_log) if strategy == 'auto' else None
+    cleaned_df = impute_missing_values(cleaned_df, strategy, cleaning_log, values=values)
+
+    # --- 9. Optimisation mémoire ---
+    if options.get('optimize_memory'):
+        cleaned_df = optimize_memory(cleaned_df, cleaning_log)
+
+    cleaned_df.attrs[CLEANING_RECIPE_ATTR] = recipe
+    cleaning_log.append(f"SUCCÈS: Nettoyage terminé. Taille finale du DataFrame : {cleaned_df.shape}.")
+    return cleaned_df, cleaning_log
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+# Nombre de lignes conservées pour l'aperçu et les graphiques en mode échantillon
+DEFAULT_SAMPLE_ROWS = 100_000
+
+
+class ReservoirSampler:
+    """
+    Échantillon aléatoire uniforme de taille fixe, tiré au fil de la lecture par blocs.
+
+    Chaque ligne reçoit une clé aléatoire et seules les `size` plus petites clés
+    sont conservées : le résultat est un échantillon uniforme du fichier complet,
+    sans jamais garder plus de `size` lignes en plus du bloc courant.
+    """
+
+    def __init__(self, size=DEFAULT_SAMPLE_ROWS, random_state=0):
+        self.size = size
+        self.random_state = random_state
+        self.reset()
+
+    def reset(self):
+        """Vide l'échantillon (par exemple avant une relecture du fichier)."""
+        self.rows_seen = 0
+        self._rng = np.random.default_rng(self.random_state)
+        self._sample = None
+        self._keys = None
+
+    def add(self, chunk):
+        """Intègre un bloc de lignes à l'échantillon."""
+        keys = self._rng.random(len(chunk))
+        self.rows_seen += len(chunk)
+        if self._sample is not None:
+            chunk = pd.concat([self._sample, chunk])
+            keys = np.concatenate([self._keys, keys])
+        if len(chunk) > self.size:
+            kept = np.sort(np.argpartition(keys, self.size)[:self.size])
+            chunk, keys = chunk.iloc[kept], keys[kept]
+        self._sample, self._keys = chunk, keys
+
+    @property
+    def sample(self):
+        """Lignes échantillonnées, dans l'ordre du fichier."""
+        if self._sample is None:
+            return None
+        return self._sample.reset_index(drop=True)
+
+    @property
+    def fraction(self):
+        """Part des lignes lues présentes dans l'échantillon."""
+        if not self.rows_seen:
+            return 1.0
+        return len(self._sample) / self.rows_seen
+
+
+def sample_frame(df, size=DEFAULT_SAMPLE_ROWS, random_state=0):
+    """Échantillon aléatoire de `size` lignes (dans l'ordre d'origine), ou le DataFrame s'il est plus petit."""
+    if df is None or len(df) <= size:
+        return df
+    return df.sample(n=size, random_state=random_state).sort_index()
@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+# Nombre de valeurs examinées pour décider du type d'une colonne
+INFERENCE_SAMPLE_SIZE = 1000
+# Part minimale de valeurs convertibles pour adopter un type (comme l'ancien seuil de 80%)
+CONVERSION_THRESHOLD = 0.8
+BOOL_MAP = {'true': True, '1': True, 'yes': True, 'oui': True,
+            'false': False, '0': False, 'no': False, 'non': False}
+# Formats de date candidats : ISO d'abord, puis français (jour en premier) avant l'américain
+DATETIME_FORMATS = [
+    '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M',
+    '%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S%z', '%Y-%m-%dT%H:%M:%S.%f%z',
+    '%d/%m/%Y', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S', '%d/%m/%y', '%d-%m-%Y', '%d.%m.%Y',
+    '%Y/%m/%d', '%Y/%m/%d %H:%M:%S',
+    '%m/%d/%Y', '%m/%d/%Y %H:%M', '%m/%d/%Y %H:%M:%S',
+]
+# Clé de `DataFrame.attrs` où sont mémorisés les formats de date détectés
+DATETIME_FORMATS_ATTR = 'datetime_formats'
+# Entiers nullables, du plus étroit au plus large
+INTEGER_DTYPES = [('Int8', np.int8), ('Int16', np.int16), ('Int32', np.int32), ('Int64', np.int64)]
+
+
+def _sample(non_null, size=INFERENCE_SAMPLE_SIZE):
+    """Échantillon systématique (valeurs régulièrement espacées) des valeurs non nulles."""
+    if len(non_null) <= size:
+        return non_null
+    positions = np.linspace(0, len(non_null) - 1, size).astype(np.int64)
+    return non_null.iloc[positions]
+
+
+def narrowest_integer_dtype(values):
+    """Plus petit entier nullable capable de contenir toutes les valeurs."""
+    if values.empty:
+        return 'Int64'
+    low, high = values.min(), values.max()
+    for name, np_type in INTEGER_DTYPES:
+        info = np.iinfo(np_type)
+        if info.min <= low and high <= info.max:
+            return name
+    return 'Int64'
+
+
+def _is_integral(values):
+    """Vrai si toutes les valeurs (non nulles) sont entières, testé de façon vectorisée."""
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return True
+    array = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    array = array[~np.isnan(array)]
+    return bool(np.isfinite(array).all() and (np.mod(array, 1) == 0).all())
+
+
+def narrow_numeric(series):
+    """
+    Convertit une série numérique vers le type le plus étroit : entier nullable
+    (Int8 à Int64) si toutes les valeurs sont entières, sinon float32 quand la
+    conversion est exacte, sinon float64.
+    """
+    non_null = series.dropna()
+    if _is_integral(non_null):
+        return series.astype(narrowest_integer_dtype(non_null))
+    array = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    narrowed = array.astype(np.float32)
+    if np.array_equal(narrowed, array, equal_nan=True):
+        return pd.Series(narrowed, index=series.index, name=series.name)
+    return pd.Series(array, index=series.index, name=series.name)
+
+
+def detect_datetime_format(series):
+    """
+    Format de date explicite (ex: '%d/%m/%Y') reconnu sur un échantillon de la
+    colonne, ou None. Les formats de `DATETIME_FORMATS` sont essayés dans l'ordre ;
+    à défaut, pandas devine le format à partir de la première valeur.
+
+    Parser avec un format explicite évite l'analyse valeur par valeur (dateutil).
+    """
+    non_null = series.dropna()
+    if non_null.empty:
+        return None
+    sample = _sample(non_null).astype(str).str.strip()
+    for date_format in DATETIME_FORMATS:
+        parsed = pd.to_datetime(sample, format=date_format, errors='coerce')
+        if parsed.notna().mean() > CONVERSION_THRESHOLD:
+            return date_format
+    date_format = guess_datetime_format(sample.iloc[0], dayfirst=True)
+    if date_format is not None:
+        parsed = pd.to_datetime(sample, format=date_format, errors='coerce')
+        if parsed.notna().mean() > CONVERSION_THRESHOLD:
+            return date_format
+    return None
+
+
+def get_datetime_format(df, column):
+    """
+    Format de date de `column`, mémorisé avec le jeu de données (`df.attrs`) :
+    la détection n'a lieu qu'une fois, au nettoyage ou à la première demande.
+    """
+    formats = df.attrs.setdefault(DATETIME_FORMATS_ATTR, {})
+    if column not in formats:
+        formats[column] = detect_datetime_format(df[column])
+    return formats[column]
+
+
+def _is_final(dtype):
+    """Dates et booléens déjà typés : rien à inférer."""
+    return pd.api.types.is_datetime64_any_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)
+
+
+def as_text(series):
+    # to_numeric sur des chaînes Arrow renvoie NaN (et non null) pour les échecs
+    if isinstance(series.dtype, pd.ArrowDtype) and pd.api.types.is_string_dtype(series.dtype):
+        return series.astype(object)
+    return series
+
+
+def take_codes(values, codes, like):
+    """
+    Colonne de même index et même nom que `like`, formée des `values` désignées
+    par `codes` (-1 pour une valeur manquante) : une simple indexation par ligne.
+    """
+    taken = pd.Series(values).array.take(codes, allow_fill=True)
+    return pd.Series(taken, index=like.index, name=like.name)
+
+
+def _infer_categorical(series):
+    """
+    `infer_column` pour une colonne catégorielle : les conversions portent sur
+    les seules catégories (une fois chaque valeur distincte), les seuils sont
+    comptés en lignes grâce au nombre d'occurrences de chaque catégorie, et la
+    colonne convertie est reconstruite à partir des codes.
+    """
+    categories = pd.Series(series.cat.categories)
+    codes = series.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+    observed = categories[counts > 0]
+    if observed.empty:
+        return series, None, None
+    required = CONVERSION_THRESHOLD * counts.sum()
+
+    # Numérique
+    converted = pd.to_numeric(as_text(categories), errors='coerce')
+    if counts[converted.notna().to_numpy()].sum() > required:
+        return infer_column(take_codes(converted, codes, series))
+
+    # Date, avec un format explicite détecté sur les valeurs distinctes
+    date_format = detect_datetime_format(observed)
+    if date_format is not None:
+        try:
+            converted = pd.to_datetime(categories, format=date_format, errors='coerce')
+            if counts[converted.notna().to_numpy()].sum() > required:
+                return take_codes(converted, codes, series), 'datetime', date_format
+        except Exception:
+            pass
+
+    # Booléen : au plus deux valeurs distinctes, toutes reconnues
+    lowered = categories.astype(str).str.lower()
+    observed_lowered = lowered[counts > 0]
+    if observed_lowered.isin(BOOL_MAP.keys()).all() and observed_lowered.nunique() <= 2:
+        return take_codes(lowered.map(BOOL_MAP), codes, series).astype('boolean'), 'boolean', None
+
+    return series, None, None
+
+
+def infer_column(series):
+    """
+    Décide du type d'une colonne et renvoie `(série convertie, type, format de date)`,
+    où type vaut 'integer', 'float', 'datetime', 'boolean' ou None si la colonne
+    est inchangée. Le format de date n'est renseigné que pour les dates analysées.
+
+    La décision est prise sur un échantillon de valeurs, puis confirmée par une
+    conversion vectorisée de la colonne complète (au moins 80% de succès). Les
+    colonnes déjà numériques sont seulement réduites à leur type le plus étroit.
+    Les colonnes catégorielles sont analysées sur leurs seules catégories.
+    """
+    dtype = series.dtype
+    if _is_final(dtype):
+        return series, None, None
+    if isinstance(dtype, pd.CategoricalDtype):
+        return _infer_categorical(series)
+
+    if pd.api.types.is_numeric_dtype(dtype):
+        converted = narrow_numeric(series)
+        kind = 'integer' if pd.api.types.is_integer_dtype(converted.dtype) else 'float'
+        return converted, kind, None
+
+    non_null = series.dropna()
+    if non_null.empty:
+        return series, None, None
+    sample = as_text(_sample(non_null))
+    required = CONVERSION_THRESHOLD * len(non_null)
+
+    # Numérique
+    if pd.to_numeric(sample, errors='coerce').notna().mean() > CONVERSION_THRESHOLD:
+        converted = pd.to_numeric(as_text(series), errors='coerce')
+        if converted.notna().sum() > required:
+            return infer_column(converted)
+
+    # Date, avec un format explicite détecté sur l'échantillon
+    date_format = detect_datetime_format(sample)
+    if date_format is not None:
+        try:
+            converted = pd.to_datetime(series, format=date_format, errors='coerce')
+            if converted.notna().sum() > required:
+                return converted, 'datetime', date_format
+        except Exception:
+            # Fuseaux horaires mélangés, dates hors limites...
+            pass
+
+    # Booléen : au plus deux valeurs distinctes, toutes reconnues
+    if sample.astype(str).str.lower().isin(BOOL_MAP.keys()).all() and non_null.nunique() <= 2:
+        lowered = series.str.lower()
+        if lowered.dropna().isin(BOOL_MAP.keys()).all():
+            return lowered.map(BOOL_MAP).astype('boolean'), 'boolean', None
+
+    return series, None, None
@@ -0,0 +1,224 @@
+"""
+Traitement par lots, sans Streamlit : chargement, nettoyage et rapport PDF de
+chaque fichier d'un dossier ou d'un motif, répartis sur un pool de processus.
+
+    python batch.py exports/ -o sorties/ --jobs 4
+    python batch.py "exports/*.csv.gz" -o sorties/ --format csv --no-pdf
+    python batch.py exports/ -o sorties/ --recipe recette_nettoyage.json
+
+Pour chaque fichier sont écrits les données nettoyées (`<nom>_nettoye.parquet`
+ou `.csv`) et le rapport (`<nom>_rapport.pdf`), où `<nom>` garde l'extension
+d'origine (`ventes.csv.gz` donne `ventes_csv_gz`) ; `resume_lot.json` résume le
+lot : options, et pour chaque fichier dimensions, durées par étape, sorties,
+journal de nettoyage ou erreur. Deux fichiers qui écriraient les mêmes sorties
+(même nom dans deux dossiers) ne sont pas traités : le second est signalé en
+erreur. Le code de sortie vaut 1 si un fichier a échoué.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from backend.datacleaning import clean_data, load_file
+from backend.recipe import apply_recipe, recipe_from_json
+from utilisation.exportpdf import create_pdf_report
+
+# Extensions reconnues lorsqu'un dossier est donné en entrée (comme la page d'import)
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx', '.xls', '.parquet', '.feather', '.arrow', '.ipc', '.gz', '.zst', '.zip')
+SUMMARY_FILE = 'resume_lot.json'
+
+
+def collect_files(inputs):
+    """Fichiers à traiter : contenu des dossiers (non récursif), motifs glob et chemins, sans doublons."""
+    files = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            matches = [os.path.join(entry, name) for name in sorted(os.listdir(entry))
+                       if name.lower().endswith(SUPPORTED_EXTENSIONS)]
+        else:
+            matches = sorted(glob.glob(entry)) or [entry]
+        for path in matches:
+            if os.path.isfile(path) and path not in files:
+                files.append(path)
+    return files
+
+
+def output_stem(path):
+    """
+    Nom de base des sorties, extension d'origine comprise pour que 'ventes.csv'
+    et 'ventes.xlsx' ne s'écrasent pas : 'ventes.csv.gz' donne 'ventes_csv_gz'.
+    """
+    name = os.path.basename(path)
+    extensions = []
+    for _ in range(2):
+        base, extension = os.path.splitext(name)
+        if extension.lower() not in SUPPORTED_EXTENSIONS:
+            break
+        name = base
+        extensions.insert(0, extension[1:])
+    return '_'.join([name] + extensions)
+
+
+def process_file(path, output_dir, options):
+    """
+    Charge, nettoie (ou rejoue une recette), écrit et documente un fichier.
+    Retourne son résumé ; une erreur est consignée dans le résumé au lieu d'être levée.
+    """
+    summary = {'fichier': path, 'statut': 'ok', 'durees_s': {}}
+    timings = summary['durees_s']
+    started = time.perf_counter()
+    try:
+        step = time.perf_counter()
+        df = load_file(path)
+        timings['chargement'] = time.perf_counter() - step
+        summary['lignes_entree'], summary['colonnes_entree'] = df.shape
+
+        step = time.perf_counter()
+        if options['recipe'] is not None:
+            cleaned_df, cleaning_log = apply_recipe(df, options['recipe'])
+        else:
+            # Les fichiers sont déjà répartis sur le pool : chaque nettoyage reste en série
+            cleaned_df, cleaning_log = clean_data(
+                df,
+                missing_value_strategy=options['missing_value_strategy'],
+                outlier_strategy=options['outlier_strategy'],
+                optimize_memory=options['optimize_memory'],
+                use_cache=False,
+                copy_on_write=True
+            )
+        del df
+        timings['nettoyage'] = time.perf_counter() - step
+        summary['lignes_sortie'], summary['colonnes_sortie'] = cleaned_df.shape
+        summary['journal'] = cleaning_log
+
+        stem = output_stem(path)
+        step = time.perf_counter()
+        data_path = os.path.join(output_dir, f"{stem}_nettoye.{options['format']}")
+        if options['format'] == 'parquet':
+            cleaned_df.to_parquet(data_path, index=False)
+        else:
+            cleaned_df.to_csv(data_path, index=False)
+        timings['ecriture'] = time.perf_counter() - step
+        summary['donnees'] = data_path
+
+        if options['pdf']:
+            step = time.perf_counter()
+            report_path = os.path.join(output_dir, f"{stem}_rapport.pdf")
+            with open(report_path, 'wb') as report:
+                report.write(create_pdf_report(cleaned_df, options['username']))
+            timings['rapport'] = time.perf_counter() - step
+            summary['rapport'] = report_path
+    except Exception as e:
+        summary['statut'] = 'erreur'
+        summary['erreur'] = f"{type(e).__name__}: {e}"
+    timings['total'] = time.perf_counter() - started
+    return summary
+
+
+def run_batch(files, output_dir, options, jobs=1, progress=print):
+    """
+    Traite les fichiers (en parallèle si `jobs` > 1) et renvoie les résumés dans
+    l'ordre des fichiers. Un fichier dont les sorties porteraient le même nom que
+    celles d'un fichier précédent est signalé en erreur sans être traité.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    summaries = {}
+    owners = {}
+    for path in files:
+        stem = output_stem(path).lower()
+        if stem in owners:
+            summaries[path] = {'fichier': path, 'statut': 'erreur', 'durees_s': {'total': 0.0},
+                               'erreur': f"Sorties en conflit avec {owners[stem]} (même nom '{output_stem(path)}')."}
+            progress(_progress_line(summaries[path], len(summaries), len(files)))
+        else:
+            owners[stem] = path
+    files_to_process = [path for path in files if path not in summaries]
+    if jobs <= 1 or len(files_to_process) <= 1:
+        for path in files_to_process:
+            summaries[path] = process_file(path, output_dir, options)
+            progress(_progress_line(summaries[path], len(summaries), len(files)))
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(files_to_process))) as pool:
+            futures = {pool.submit(process_file, path, output_dir, options): path for path in files_to_process}
+            for future in as_completed(futures):
+                summaries[futures[future]] = future.result()
+                progress(_progress_line(summaries[futures[future]], len(summaries), len(files)))
+    return [summaries[path] for path in files]
+
+
+def _progress_line(summary, done, total):
+    status = (f"{summary['durees_s']['total']:.1f} s" if summary['statut'] == 'ok'
+              else f"ÉCHEC ({summary['erreur']})")
+    return f"[{done}/{total}] {summary['fichier']} : {status}"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Nettoyage et rapports PDF par lots, sans interface Streamlit.")
+    parser.add_argument('inputs', nargs='+', help="Dossiers, fichiers ou motifs glob (ex: 'exports/*.csv').")
+    parser.add_argument('-o', '--output-dir', required=True, help="Dossier de sortie (créé si besoin).")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Nombre de fichiers traités en parallèle (défaut : nombre de cœurs).")
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet',
+                        help="Format des données nettoyées (défaut : parquet).")
+    parser.add_argument('--no-pdf', dest='pdf', action='store_false', help="Ne pas générer de rapport PDF.")
+    parser.add_argument('--missing', choices=['auto', 'remove_row', 'none'], default='auto',
+                        help="Stratégie pour les valeurs manquantes (défaut : auto).")
+    parser.add_argument('--outliers', choices=['flag', 'cap', 'remove', 'none'], default='flag',
+                        help="Stratégie pour les valeurs aberrantes (défaut : flag).")
+    parser.add_argument('--optimize-memory', action='store_true',
+                        help="Compacter les types des données nettoyées.")
+    parser.add_argument('--recipe', help="Recette JSON à rejouer au lieu d'un nettoyage complet.")
+    parser.add_argument('--username', default='batch', help="Nom affiché dans les rapports PDF.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    files = collect_files(args.inputs)
+    if not files:
+        print("Aucun fichier à traiter.", file=sys.stderr)
+        return 2
+
+    recipe = None
+    if args.recipe:
+        with open(args.recipe, encoding='utf-8') as f:
+            recipe = recipe_from_json(f.read())
+    options = {
+        'format': args.format,
+        'pdf': args.pdf,
+        'missing_value_strategy': args.missing,
+        'outlier_strategy': args.outliers,
+        'optimize_memory': args.optimize_memory,
+        'recipe': recipe,
+        'username': args.username,
+    }
+
+    started_at, started = datetime.now(), time.perf_counter()
+    summaries = run_batch(files, args.output_dir, options, jobs=args.jobs,
+                          progress=lambda line: print(line, file=sys.stderr))
+    failures = sum(summary['statut'] != 'ok' for summary in summaries)
+    run_summary = {
+        'debut': started_at.isoformat(timespec='seconds'),
+        'duree_s': time.perf_counter() - started,
+        'processus': args.jobs,
+        'options': {**{k: v for k, v in options.items() if k != 'recipe'}, 'recette': args.recipe},
+        'fichiers_traites': len(summaries) - failures,
+        'fichiers_en_echec': failures,
+        'fichiers': summaries,
+    }
+    summary_path = os.path.join(args.output_dir, SUMMARY_FILE)
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(run_summary, f, ensure_ascii=False, indent=2)
+    print(f"{len(summaries) - failures}/{len(summaries)} fichier(s) traité(s) ; résumé : {summary_path}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
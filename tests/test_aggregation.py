@@ -0,0 +1,40 @@
+import numpy as np
+
+from backend.aggregation import MAX_HISTOGRAM_BINS, histogram_bins
+
+
+def test_exactly_max_bins_is_not_widened():
+    values = np.arange(0, MAX_HISTOGRAM_BINS + 1, dtype=np.float64)
+
+    counts, edges, widened = histogram_bins(values, bin_width=1.0)
+
+    assert len(counts) == MAX_HISTOGRAM_BINS
+    assert not widened
+    assert edges[1] - edges[0] == 1.0
+
+
+def test_too_narrow_width_is_widened():
+    values = np.arange(0, 10_001, dtype=np.float64)
+
+    counts, edges, widened = histogram_bins(values, bin_width=1.0)
+
+    assert widened
+    assert len(counts) == MAX_HISTOGRAM_BINS
+    assert edges[1] - edges[0] > 1.0
+    assert counts.sum() == len(values)
+
+
+def test_empty_and_constant_values():
+    assert histogram_bins(np.array([]))[2] is False
+    counts, _, widened = histogram_bins(np.full(10, 3.0), bin_width=0.001)
+    assert counts.tolist() == [10] and not widened
+
+
+def test_requested_width_is_respected():
+    for values in (np.arange(0, 96, dtype=np.float64), np.array([3.0, 17.0, 42.0])):
+        counts, edges, widened = histogram_bins(values, bin_width=10.0)
+
+        assert np.allclose(np.diff(edges), 10.0)
+        assert edges[0] == values.min() and edges[-1] >= values.max()
+        assert counts.sum() == len(values)
+        assert not widened
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.datacleaning import clean_data, load_file
+import visualisation
+
+
+@pytest.fixture
+def frame_with_nulls():
+    rng = np.random.default_rng(0)
+    n = 500
+    df = pd.DataFrame({
+        'montant_total': rng.normal(100, 10, n),
+        'quantite': pd.array(rng.integers(0, 9, n), dtype='Int64'),
+        'ville': rng.choice(['Paris', 'Lyon', 'Nice'], n).astype(object),
+        'vide': [None] * n,
+    })
+    df.loc[::7, 'ville'] = None
+    df.loc[::11, 'montant_total'] = np.nan
+    df.loc[::13, 'quantite'] = pd.NA
+    return df
+
+
+@pytest.mark.parametrize('extension', ['parquet', 'feather'])
+def test_arrow_text_columns_load_like_csv(tmp_path, frame_with_nulls, extension):
+    path = tmp_path / f"donnees.{extension}"
+    getattr(frame_with_nulls, f"to_{extension}")(path)
+
+    df = load_file(str(path))
+
+    assert df['ville'].dtype == object
+    assert df['vide'].dtype == object
+    assert isinstance(df['montant_total'].dtype, pd.ArrowDtype)
+    assert df['ville'].isna().sum() == frame_with_nulls['ville'].isna().sum()
+
+
+def test_parquet_with_nulls_through_cleaning_and_figures(tmp_path, frame_with_nulls):
+    path = tmp_path / "donnees.parquet"
+    frame_with_nulls.to_parquet(path)
+    cleaned, _ = clean_data(load_file(str(path)), missing_value_strategy='none', use_cache=False)
+
+    assert cleaned['ville'].isna().any()
+    visualisation._overview_views(cleaned)
+    visualisation._numeric_distribution(cleaned, 'montant_total', 0)
+    visualisation._category_frequencies(cleaned, 'ville')
+    visualisation._group_comparison(cleaned, cleaned, 'montant_total', 'ville')
+    visualisation.create_scatter_figure(cleaned, 'montant_total', 'quantite', 'ville')
+
+
+@pytest.mark.parametrize('dtype', ['string', 'string[pyarrow]', 'category', object])
+def test_scatter_colour_column_with_nulls(dtype):
+    rng = np.random.default_rng(1)
+    n = 300
+    cities = pd.Series(rng.choice(['Paris', 'Lyon'], n), dtype=object)
+    cities[::5] = None
+    df = pd.DataFrame({'x': rng.normal(size=n), 'y': rng.normal(size=n), 'ville': cities.astype(dtype)})
+
+    fig, mode = visualisation.create_scatter_figure(df, 'x', 'y', 'ville')
+
+    markers = {trace.name: len(trace.x) for trace in fig.data if trace.mode == 'markers'}
+    assert mode == 'svg'
+    assert markers['Autres'] == cities.isna().sum()
+    assert sum(markers.values()) == n
+    visualisation._group_comparison(df, df, 'x', 'ville')
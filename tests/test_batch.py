@@ -0,0 +1,33 @@
+import gzip
+
+import pandas as pd
+
+from batch import output_stem, run_batch
+
+OPTIONS = {'format': 'csv', 'pdf': False, 'missing_value_strategy': 'auto', 'outlier_strategy': 'flag',
+           'optimize_memory': False, 'recipe': None, 'username': 'test'}
+
+
+def test_output_stem_keeps_source_extension():
+    assert output_stem('exports/ventes.csv') == 'ventes_csv'
+    assert output_stem('exports/ventes.xlsx') == 'ventes_xlsx'
+    assert output_stem('exports/ventes.csv.gz') == 'ventes_csv_gz'
+    assert output_stem('exports/ventes.2024.csv') == 'ventes.2024_csv'
+
+
+def test_colliding_outputs_are_reported(tmp_path):
+    csv_text = "montant,ville\n1,Paris\n2,Lyon\n3,Nice\n"
+    for folder in ('janvier', 'fevrier'):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "ventes.csv").write_text(csv_text)
+    with gzip.open(tmp_path / "janvier" / "ventes.csv.gz", 'wt') as f:
+        f.write(csv_text)
+    files = [str(tmp_path / "janvier" / "ventes.csv"), str(tmp_path / "janvier" / "ventes.csv.gz"),
+             str(tmp_path / "fevrier" / "ventes.csv")]
+
+    summaries = run_batch(files, str(tmp_path / "sorties"), OPTIONS, progress=lambda line: None)
+
+    assert [summary['statut'] for summary in summaries] == ['ok', 'ok', 'erreur']
+    assert files[0] in summaries[2]['erreur']
+    assert summaries[0]['donnees'] != summaries[1]['donnees']
+    assert len(pd.read_csv(summaries[1]['donnees'])) == 3
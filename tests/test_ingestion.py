@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.datacleaning import DataLoadError, load_file
+from backend.ingestion import compact_dtypes
+
+
+def test_compact_dtypes_narrows_nullable_integers():
+    df = pd.DataFrame({
+        'petit': pd.array([1, None, 100], dtype='Int64'),
+        'moyen': pd.array([1, 2, 40_000], dtype='Int64'),
+        'grand': pd.array([1, 2, 2**40], dtype='Int64'),
+    })
+
+    compact = compact_dtypes(df)
+
+    assert compact.dtypes.astype(str).tolist() == ['Int8', 'Int32', 'Int64']
+    assert compact['petit'].isna().sum() == 1
+
+
+def test_chunked_csv_keeps_compact_integers(tmp_path):
+    n = 400_000
+    rng = np.random.default_rng(0)
+    path = tmp_path / "ventes.csv"
+    pd.DataFrame({
+        'id': np.arange(n),
+        'quantite': rng.integers(0, 10, n),
+        'magasin': rng.integers(1, 50, n),
+    }).to_csv(path, index=False)
+
+    df = load_file(str(path), chunksize=100_000)
+
+    assert df.dtypes.astype(str).tolist() == ['Int32', 'Int8', 'Int8']
+    # 4 + 1 + 1 octets de valeurs et un octet de masque par colonne, au lieu de 3 × 9 en Int64
+    assert df.memory_usage(index=False).sum() <= n * 9
+
+
+def test_arrow_path_is_memory_mapped(tmp_path, monkeypatch):
+    import pyarrow as pa
+
+    path = tmp_path / "ventes.parquet"
+    pd.DataFrame({'montant': [1.5, 2.5, None]}).to_parquet(path)
+    mapped = []
+    memory_map = pa.memory_map
+    monkeypatch.setattr(pa, 'memory_map', lambda *args: mapped.append(args[0]) or memory_map(*args))
+
+    df = load_file(str(path))
+
+    assert mapped == [str(path)]
+    assert df['montant'].isna().sum() == 1
+
+
+def test_missing_arrow_path_raises_load_error(tmp_path):
+    with pytest.raises(DataLoadError):
+        load_file(str(tmp_path / "absent.feather"))
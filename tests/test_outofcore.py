@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.datacleaning import clean_data, load_file
+from backend.outofcore import clean_file_out_of_core
+
+
+@pytest.mark.parametrize('extension', ['parquet', 'feather'])
+def test_empty_column_in_arrow_input(tmp_path, extension):
+    n = 1000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'montant': rng.normal(100, 10, n),
+        'Ville': rng.choice([' Paris', 'LYON '], n).astype(object),
+        'vide': [None] * n,
+    })
+    source = tmp_path / f"donnees.{extension}"
+    getattr(df, f"to_{extension}")(source)
+
+    output, cleaning_log = clean_file_out_of_core(source, tmp_path / "propre.parquet", chunksize=300)
+
+    cleaned = pd.read_parquet(output)
+    assert 'vide' not in cleaned.columns
+    assert set(cleaned['ville']) == {'paris', 'lyon'}
+    assert cleaning_log[-1].startswith("SUCCÈS")
+
+
+def test_csv_type_log_matches_in_memory_cleaning(tmp_path):
+    n = 1000
+    rng = np.random.default_rng(0)
+    qte = rng.integers(1, 50, n).astype(float)
+    qte[::7] = np.nan
+    df = pd.DataFrame({
+        'Montant total': rng.normal(100, 10, n).round(2),
+        'qte': qte,
+        'ville': rng.choice(['paris', 'lyon'], n),
+    })
+    source = tmp_path / "ventes.csv"
+    df.to_csv(source, index=False)
+
+    def type_lines(cleaning_log):
+        return [line for line in cleaning_log if 'types de colonnes' in line]
+
+    _, in_memory_log = clean_data(load_file(source), use_cache=False)
+    _, out_of_core_log = clean_file_out_of_core(source, tmp_path / "propre.parquet", chunksize=300)
+
+    assert type_lines(out_of_core_log) == type_lines(in_memory_log)
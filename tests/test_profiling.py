@@ -0,0 +1,35 @@
+import tracemalloc
+
+from backend.profiling import StageRecorder
+
+
+def test_tracing_survives_until_last_recorder_exits():
+    first, second = StageRecorder(memory=True), StageRecorder(memory=True)
+
+    first.__enter__()
+    second.__enter__()
+    first.__exit__(None, None, None)
+    assert tracemalloc.is_tracing()
+
+    with second.stage('étape'):
+        data = list(range(1000))
+    second.__exit__(None, None, None)
+
+    assert not tracemalloc.is_tracing()
+    assert second.report()['pic_mo'].iloc[0] > 0
+    del data
+
+
+def test_external_tracing_is_left_running():
+    tracemalloc.start()
+    try:
+        with StageRecorder(memory=True):
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_disabled_recorder_does_not_trace():
+    with StageRecorder():
+        assert not tracemalloc.is_tracing()
@@ -1,4 +1,3 @@
-import streamlit as st
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -7,16 +6,18 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 from io import BytesIO
 import pandas as pd
-import numpy as np
 from datetime import datetime
 from scipy import stats
 from itertools import combinations
+from backend.datasetprofile import get_dataset_profile
 
 def create_pdf_report(data, username, theme_sujet="Analyse de Données d'Entreprise"):
     """
     Génération d'un rapport PDF d'analyse exploratoire de données,
     inspiré d'un modèle académique et incluant des analyses avancées.
     """
+    # Statistiques calculées une fois par jeu de données, partagées avec la visualisation et les recommandations
+    profile = get_dataset_profile(data)
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
     
@@ -80,8 +81,8 @@ def create_pdf_report(data, username, theme_sujet="Analyse de Données d'Entrepr
     story.append(Paragraph("Table des variables", h2_style))
     variable_table_data = [['Nom de variable', 'Type de données', 'Exemples de valeurs']]
     for col in data.columns:
-        dtype = str(data[col].dtype)
-        examples = ', '.join(map(str, data[col].dropna().unique()[:3])) + '...'
+        dtype = str(profile.dtypes[col])
+        examples = ', '.join(map(str, profile.examples[col])) + '...'
         variable_table_data.append([col, dtype, examples])
     var_table = Table(variable_table_data, hAlign='LEFT')
     var_table.setStyle(table_header_style)
@@ -91,8 +92,8 @@ def create_pdf_report(data, username, theme_sujet="Analyse de Données d'Entrepr
     # --- 3. MÉTHODOLOGIE & NETTOYAGE ---
     story.append(Paragraph("3. Méthodologie et Nettoyage", h1_style))
     story.append(Paragraph("Inspection et correction des données", h2_style))
-    duplicates_count = data.duplicated().sum()
-    missing_data_report = data.isnull().sum()
+    duplicates_count = profile.duplicates
+    missing_data_report = profile.null_counts
     missing_data_report = missing_data_report[missing_data_report > 0].to_dict()
 
     cleaning_summary = [["Étape", "Résultat observé"]]
@@ -112,10 +113,10 @@ def create_pdf_report(data, username, theme_sujet="Analyse de Données d'Entrepr
     # --- 4. ANALYSE UNIVARIÉE ---
     story.append(Paragraph("4. Analyse univariée", h1_style))
     story.append(Paragraph("Variables numériques", h2_style))
-    numeric_df = data.select_dtypes(include=np.number)
-    if not numeric_df.empty:
+    numeric_columns = profile.numeric_columns
+    if numeric_columns:
         stats_data = [['Variable', 'Moyenne', 'Médiane', 'Écart-type', 'Min', 'Max']]
-        desc = numeric_df.describe().T
+        desc = profile.describe
         for col, row in desc.iterrows():
             stats_data.append([col, f"{row['mean']:.2f}", f"{row['50%']:.2f}", f"{row['std']:.2f}", f"{row['min']:.2f}", f"{row['max']:.2f}"])
         stats_table = Table(stats_data, hAlign='LEFT')
@@ -126,15 +127,16 @@ def create_pdf_report(data, username, theme_sujet="Analyse de Données d'Entrepr
         story.append(Paragraph("Aucune variable numérique à analyser.", normal_style))
 
     story.append(Paragraph("Variables catégorielles", h2_style))
-    cat_df = data.select_dtypes(include=['object', 'category'])
-    if not cat_df.empty:
-        for col in cat_df.columns:
+    cat_columns = profile.categorical_columns
+    non_null_counts = profile.non_null_counts()
+    if cat_columns:
+        for col in cat_columns:
             story.append(Paragraph(f"Distribution pour '{col}'", styles['h4']))
             freq_data = [['Modalité', 'Fréquence', 'Pourcentage']]
-            counts = cat_df[col].value_counts(normalize=True)
-            for val, pct in counts.head(5).items(): # Top 5
-                freq_data.append([val, f"{cat_df[col].value_counts()[val]}", f"{pct:.1%}"])
-            if len(counts) > 5:
+            counts = profile.value_counts[col]
+            for val, count in counts.head(5).items(): # Top 5
+                freq_data.append([val, f"{count}", f"{count / non_null_counts[col]:.1%}"])
+            if profile.nunique[col] > 5:
                 freq_data.append(["Autres...", "", ""])
 
             freq_table = Table(freq_data, hAlign='LEFT', colWidths=[3*inch, 1.5*inch, 1.5*inch])
@@ -150,8 +152,8 @@ def create_pdf_report(data, username, theme_sujet="Analyse de Données d'Entrepr
     # --- 5. ANALYSE BIVARIÉE ---
     story.append(Paragraph("5. Analyse bivariée", h1_style))
     story.append(Paragraph("Corrélation entre variables numériques", h2_style))
-    if len(numeric_df.columns) > 1:
-        corr_matrix = numeric_df.corr()
+    if len(numeric_columns) > 1:
+        corr_matrix = profile.correlation
         corr_data = [['Variable 1', 'Variable 2', 'Coefficient (r)']]
         # Unstack to get pairs
         corr_pairs = corr_matrix.unstack().sort_values(ascending=False).drop_duplicates()
@@ -173,10 +175,10 @@ def create_pdf_report(data, username, theme_sujet="Analyse de Données d'Entrepr
     test_results = [['Test', 'Variables', 'Statistique', 'P-Value', 'Interprétation']]
     
     # T-test (Numérique vs Catégorielle à 2 modalités)
-    for num_col in numeric_df.columns:
-        for cat_col in cat_df.columns:
-            if cat_df[cat_col].nunique() == 2:
-                groups = cat_df[cat_col].unique()
+    for num_col in numeric_columns:
+        for cat_col in cat_columns:
+            if profile.nunique[cat_col] == 2:
+                groups = data[cat_col].unique()
                 group1 = data[data[cat_col] == groups[0]][num_col].dropna()
                 group2 = data[data[cat_col] == groups[1]][num_col].dropna()
                 if len(group1) > 1 and len(group2) > 1:
@@ -185,10 +187,11 @@ def create_pdf_report(data, username, theme_sujet="Analyse de Données d'Entrepr
                     test_results.append(['T-test', f"{num_col} vs {cat_col}", f"t={stat:.2f}", f"{pval:.3f}", interp])
 
     # ANOVA (Numérique vs Catégorielle > 2 modalités)
-    for num_col in numeric_df.columns:
-        for cat_col in cat_df.columns:
-            if cat_df[cat_col].nunique() > 2:
-                groups = [data[data[cat_col] == g][num_col].dropna() for g in cat_df[cat_col].unique()]
+    for num_col in numeric_columns:
+        for cat_col in cat_columns:
+            if profile.nunique[cat_col] > 2:
+                # Un seul regroupement au lieu d'un filtre du jeu complet par modalité
+                groups = [g.dropna() for _, g in data.groupby(cat_col, sort=False, observed=True)[num_col]]
                 groups = [g for g in groups if len(g) > 1]
                 if len(groups) > 2:
                     stat, pval = stats.f_oneway(*groups)
@@ -196,8 +199,8 @@ def create_pdf_report(data, username, theme_sujet="Analyse de Données d'Entrepr
                     test_results.append(['ANOVA', f"{num_col} vs {cat_col}", f"F={stat:.2f}", f"{pval:.3f}", interp])
 
     # Khi-deux (Catégorielle vs Catégorielle)
-    if len(cat_df.columns) > 1:
-        for v1, v2 in combinations(cat_df.columns, 2):
+    if len(cat_columns) > 1:
+        for v1, v2 in combinations(cat_columns, 2):
             contingency_table = pd.crosstab(data[v1], data[v2])
             chi2, pval, _, _ = stats.chi2_contingency(contingency_table)
             interp = "Association significative" if pval < 0.05 else "Pas d'association"
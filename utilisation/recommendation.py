@@ -1,5 +1,4 @@
-import pandas as pd
-import numpy as np
+from backend.datasetprofile import get_dataset_profile
 
 def generate_recommendations(df):
     """Génération de recommandations intelligentes basées sur l'analyse des données"""
@@ -7,30 +6,33 @@ def generate_recommendations(df):
         return [{"type": "error", "message": "Aucune donnée à analyser"}]
     
     recommendations = []
+    # Statistiques calculées une fois par jeu de données, partagées avec la visualisation et le PDF
+    profile = get_dataset_profile(df)
     
     # 1. Analyse de la qualité des données
-    recommendations.extend(analyze_data_quality(df))
+    recommendations.extend(analyze_data_quality(df, profile))
     
     # 2. Analyse des valeurs manquantes
-    recommendations.extend(analyze_missing_values(df))
+    recommendations.extend(analyze_missing_values(df, profile))
     
     # 3. Analyse des valeurs aberrantes
-    recommendations.extend(analyze_outliers(df))
+    recommendations.extend(analyze_outliers(df, profile))
     
     # 4. Analyse de la distribution des données
-    recommendations.extend(analyze_data_distribution(df))
+    recommendations.extend(analyze_data_distribution(df, profile))
     
     # 5. Recommandations métier
-    recommendations.extend(generate_business_recommendations(df))
+    recommendations.extend(generate_business_recommendations(df, profile))
     
     # 6. Recommandations de performance
-    recommendations.extend(analyze_performance_metrics(df))
+    recommendations.extend(analyze_performance_metrics(df, profile))
     
     return recommendations
 
-def analyze_data_quality(df):
+def analyze_data_quality(df, profile=None):
     """Analyse de la qualité générale des données"""
     recommendations = []
+    profile = profile or get_dataset_profile(df)
     
     # Vérification de la taille du dataset
     if len(df) < 10:
@@ -57,7 +59,7 @@ def analyze_data_quality(df):
         })
     
     # Vérification des doublons
-    duplicates = df.duplicated().sum()
+    duplicates = profile.duplicates
     if duplicates > 0:
         recommendations.append({
             "type": "warning",
@@ -71,12 +73,13 @@ def analyze_data_quality(df):
     
     return recommendations
 
-def analyze_missing_values(df):
+def analyze_missing_values(df, profile=None):
     """Analyse des valeurs manquantes"""
     recommendations = []
+    profile = profile or get_dataset_profile(df)
     
-    missing_stats = df.isnull().sum()
-    total_missing = missing_stats.sum()
+    missing_stats = profile.null_counts
+    total_missing = profile.total_missing
     
     if total_missing == 0:
         recommendations.append({
@@ -112,27 +115,18 @@ def analyze_missing_values(df):
     
     return recommendations
 
-def analyze_outliers(df):
+def analyze_outliers(df, profile=None):
     """Analyse des valeurs aberrantes"""
     recommendations = []
-    
-    numeric_columns = df.select_dtypes(include=[np.number]).columns
+    profile = profile or get_dataset_profile(df)
     outlier_columns = []
     
-    for col in numeric_columns:
-        if not col.endswith('_outlier'):  # Éviter les colonnes d'indicateurs d'outliers
-            Q1 = df[col].quantile(0.25)
-            Q3 = df[col].quantile(0.75)
-            IQR = Q3 - Q1
-            
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            
-            outliers = ((df[col] < lower_bound) | (df[col] > upper_bound)).sum()
-            
-            if outliers > 0:
-                outlier_percentage = (outliers / len(df)) * 100
-                outlier_columns.append((col, outliers, outlier_percentage))
+    # Colonnes d'indicateurs d'outliers exclues ; bornes à 1.5 × IQR des quartiles
+    for col in profile.analysis_columns():
+        outliers = int(profile.outlier_counts[col])
+        if outliers > 0:
+            outlier_percentage = (outliers / len(df)) * 100
+            outlier_columns.append((col, outliers, outlier_percentage))
     
     if not outlier_columns:
         recommendations.append({
@@ -154,35 +148,32 @@ def analyze_outliers(df):
     
     return recommendations
 
-def analyze_data_distribution(df):
+def analyze_data_distribution(df, profile=None):
     """Analyse de la distribution des données"""
     recommendations = []
+    profile = profile or get_dataset_profile(df)
     
-    numeric_columns = df.select_dtypes(include=[np.number]).columns
-    
-    for col in numeric_columns:
-        if not col.endswith('_outlier'):
-            # Analyse de la variance
-            if df[col].var() == 0:
-                recommendations.append({
-                    "type": "warning",
-                    "message": f"Colonne '{col}' a une variance nulle (valeurs constantes). Considérez la supprimer."
-                })
-            
-            # Analyse de l'asymétrie
-            skewness = df[col].skew()
-            if abs(skewness) > 2:
-                recommendations.append({
-                    "type": "info",
-                    "message": f"Distribution très asymétrique pour '{col}' (skewness: {skewness:.2f}). Transformation recommandée."
-                })
+    for col in profile.analysis_columns():
+        # Analyse de la variance
+        if profile.variance[col] == 0:
+            recommendations.append({
+                "type": "warning",
+                "message": f"Colonne '{col}' a une variance nulle (valeurs constantes). Considérez la supprimer."
+            })
+        
+        # Analyse de l'asymétrie
+        skewness = profile.skewness[col]
+        if abs(skewness) > 2:
+            recommendations.append({
+                "type": "info",
+                "message": f"Distribution très asymétrique pour '{col}' (skewness: {skewness:.2f}). Transformation recommandée."
+            })
     
     # Analyse des colonnes catégorielles
-    categorical_columns = df.select_dtypes(include=['object']).columns
-    
-    for col in categorical_columns:
-        unique_values = df[col].nunique()
-        total_values = len(df[col].dropna())
+    non_null_counts = profile.non_null_counts()
+    for col in profile.categorical_columns:
+        unique_values = profile.nunique[col]
+        total_values = non_null_counts[col]
         
         if unique_values == total_values:
             recommendations.append({
@@ -202,9 +193,10 @@ def analyze_data_distribution(df):
     
     return recommendations
 
-def generate_business_recommendations(df):
+def generate_business_recommendations(df, profile=None):
     """Génération de recommandations métier basées sur les patterns des données"""
     recommendations = []
+    profile = profile or get_dataset_profile(df)
     
     # Détection de colonnes potentiellement importantes pour le business
     business_keywords = {
@@ -246,9 +238,8 @@ def generate_business_recommendations(df):
         })
     
     # Analyse des corrélations pour les données numériques
-    numeric_df = df.select_dtypes(include=[np.number])
-    if len(numeric_df.columns) > 1:
-        corr_matrix = numeric_df.corr()
+    if len(profile.numeric_columns) > 1:
+        corr_matrix = profile.correlation
         high_corr_pairs = []
         
         for i in range(len(corr_matrix.columns)):
@@ -265,12 +256,13 @@ def generate_business_recommendations(df):
     
     return recommendations
 
-def analyze_performance_metrics(df):
+def analyze_performance_metrics(df, profile=None):
     """Analyse des métriques de performance et recommandations d'optimisation"""
     recommendations = []
+    profile = profile or get_dataset_profile(df)
     
     # Analyse de la taille mémoire
-    memory_usage = df.memory_usage(deep=True).sum() / 1024 / 1024  # MB
+    memory_usage = profile.memory_bytes / 1024 / 1024  # MB
     
     if memory_usage > 100:
         recommendations.append({
@@ -282,14 +274,14 @@ def analyze_performance_metrics(df):
     optimization_suggestions = []
     
     for col in df.columns:
-        if df[col].dtype == 'object':
-            unique_ratio = df[col].nunique() / len(df)
+        if profile.dtypes[col] == 'object':
+            unique_ratio = profile.nunique[col] / len(df)
             if unique_ratio < 0.5:  # Moins de 50% de valeurs uniques
                 optimization_suggestions.append(f"'{col}' pourrait être converti en catégorie")
         
-        elif df[col].dtype == 'int64':
-            max_val = df[col].max()
-            min_val = df[col].min()
+        elif profile.dtypes[col] == 'int64':
+            max_val = profile.describe.at[col, 'max']
+            min_val = profile.describe.at[col, 'min']
             if max_val < 127 and min_val > -128:
                 optimization_suggestions.append(f"'{col}' pourrait être converti en int8")
             elif max_val < 32767 and min_val > -32768:
@@ -298,13 +290,12 @@ def analyze_performance_metrics(df):
     if optimization_suggestions:
         recommendations.append({
             "type": "info",
-            "message": f"Optimisations possibles: {'; '.join(optimization_suggestions[:3])}{'...' if len(optimization_suggestions) > 3 else ''}"
+            "message": f"Optimisations possibles (option « Optimiser la mémoire » du nettoyage): {'; '.join(optimization_suggestions[:3])}{'...' if len(optimization_suggestions) > 3 else ''}"
         })
     
     # Recommandations d'indexation pour les gros datasets
     if len(df) > 10000:
-        categorical_cols = df.select_dtypes(include=['object']).columns
-        if len(categorical_cols) > 0:
+        if profile.categorical_columns:
             recommendations.append({
                 "type": "info",
                 "message": "Pour un dataset de cette taille, considérez l'indexation des colonnes catégorielles fréquemment utilisées."
@@ -318,25 +309,26 @@ def get_data_insights(df):
     
     if df is None or df.empty:
         return insights
+    profile = get_dataset_profile(df)
     
     # Insight sur la taille
     insights.append(f"Dataset contient {len(df):,} lignes et {len(df.columns)} colonnes")
     
     # Insight sur les types de données
-    type_counts = df.dtypes.value_counts()
+    type_counts = profile.dtypes.value_counts()
     insights.append(f"Types de données: {dict(type_counts)}")
     
     # Insight sur la complétude
-    completeness = (1 - df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100
+    completeness = profile.completeness
     insights.append(f"Complétude des données: {completeness:.1f}%")
     
     # Insights sur les colonnes numériques
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    numeric_cols = profile.numeric_columns
     if len(numeric_cols) > 0:
         insights.append(f"Colonnes numériques: {len(numeric_cols)} ({', '.join(numeric_cols[:3])}{'...' if len(numeric_cols) > 3 else ''})")
     
     # Insights sur les colonnes catégorielles
-    cat_cols = df.select_dtypes(include=['object']).columns
+    cat_cols = profile.categorical_columns
     if len(cat_cols) > 0:
         insights.append(f"Colonnes catégorielles: {len(cat_cols)} ({', '.join(cat_cols[:3])}{'...' if len(cat_cols) > 3 else ''})")
     
@@ -1,9 +1,17 @@
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from backend.aggregation import (MAX_HISTOGRAM_BINS, auto_granularity, box_summary, density_grid, finite_values,
+                                 half_trend, histogram_bins, linear_fit, paired_finite_values, scatter_mode,
+                                 time_rollups)
+from backend.cache import LRUCache, fingerprint_frame
+from backend.datasetprofile import get_dataset_profile
+from backend.sampling import DEFAULT_SAMPLE_ROWS, sample_frame
+from backend.typeinference import get_datetime_format
 
 # --- CONFIGURATION & FONCTIONS UTILITAIRES (Inchangé) ---
 PLOTLY_CONFIG = {
@@ -16,19 +24,72 @@ PLOTLY_CONFIG = {
     }
 }
 
+# Nombre maximal de catégories colorées dans un nuage de points ; les autres sont regroupées
+MAX_COLOR_GROUPS = 10
+# Case à cocher désactivant l'échantillon de la comparaison par groupe
+FULL_DATA_LABEL = "Boîtes par groupe sur les données complètes"
+# Budget mémoire du cache des vues, statistiques et figures (en Mo, configurable par variable d'environnement)
+VIEW_CACHE_MB = int(os.environ.get('SMARTDATA_VIEW_CACHE_MB', '256'))
+_view_cache = LRUCache(VIEW_CACHE_MB * 1024 * 1024)
+_MISSING = object()
+
+def cached_view(df, name, params, compute):
+    """
+    Résultat de `compute()` pour la vue `name` de `df` avec les paramètres `params`,
+    repris du cache s'il a déjà été calculé. Streamlit réexécute tout le script à
+    chaque interaction : seules les vues dont les paramètres changent sont recalculées.
+
+    La clé part de l'empreinte du contenu (`fingerprint_frame`, calculée une fois
+    par jeu de données) : le même fichier rechargé ou ouvert dans une autre session
+    retrouve ses vues. Le cache est partagé et borné par `VIEW_CACHE_MB` (LRU).
+    """
+    key = (fingerprint_frame(df), name, params)
+    result = _view_cache.get(key, _MISSING)
+    if result is _MISSING:
+        result = compute()
+        _view_cache.put(key, result)
+    return result
+
 def get_numeric_columns(df):
     numeric_cols = df.select_dtypes(include=np.number).columns.tolist()
     return [col for col in numeric_cols if not col.endswith('_outlier')]
 
 def get_categorical_columns(df):
-    return df.select_dtypes(include=['object', 'category']).columns.tolist()
+    # 'string' couvre les chaînes Arrow produites par l'optimisation mémoire du nettoyage
+    return df.select_dtypes(include=['object', 'category', 'string']).columns.tolist()
+
+def get_view_sample(df):
+    """Échantillon du DataFrame pour les boîtes par groupe, tiré une seule fois par jeu de données."""
+    cached = st.session_state.get('view_sample')
+    if cached is None or cached[0] is not df:
+        cached = (df, sample_frame(df, DEFAULT_SAMPLE_ROWS))
+        st.session_state.view_sample = cached
+    return cached[1]
+
+def show_sample_notice(sample_df, df):
+    """Indique que les boîtes de la comparaison par groupe sont tracées sur un échantillon, et sur quelle fraction des données."""
+    if sample_df is None or len(sample_df) >= len(df):
+        return
+    st.caption(f"📉 Boîtes tracées sur un échantillon aléatoire de {len(sample_df):,} lignes sur {len(df):,} "
+               f"({len(sample_df) / len(df):.1%}) ; les statistiques par groupe portent sur toutes les lignes. "
+               f"Cochez « {FULL_DATA_LABEL} » pour des boîtes exactes.")
 
 # --- NOUVELLE FONCTION POUR LE DASHBOARD KPI ---
 
+def _kpi_rollups(df, date_col, metric_col):
+    """Agrégats temporels de la métrique (voir `backend.aggregation.time_rollups`), dates analysées au besoin."""
+    dates = df[date_col]
+    if not pd.api.types.is_datetime64_any_dtype(dates.dtype):
+        # Format détecté une seule fois et mémorisé avec le jeu de données
+        dates = pd.to_datetime(dates, format=get_datetime_format(df, date_col))
+    return time_rollups(dates, df[metric_col])
+
 def create_kpi_dashboard(df, numeric_cols, all_cols):
     """
     Crée un dashboard de KPIs interactif où l'utilisateur définit les métriques.
     Aide à suivre la performance de l'activité représentée par les données.
+    Les agrégats par jour, semaine, mois et trimestre sont calculés une fois par
+    couple (date, métrique) sur toutes les lignes, puis repris du cache.
     """
     st.markdown("### ⭐ Indicateurs Clés de Performance (KPIs)")
     st.info(
@@ -63,29 +124,26 @@ def create_kpi_dashboard(df, numeric_cols, all_cols):
     
     # KPI 1: Total et Moyenne de la métrique
     if metric_col:
-        total_metric = df[metric_col].sum()
-        mean_metric = df[metric_col].mean()
+        total_metric, mean_metric = cached_view(df, 'kpi_metric', (metric_col,),
+                                                lambda: (df[metric_col].sum(), df[metric_col].mean()))
         kpi_cols[0].metric(f"Total de {metric_col}", f"{total_metric:,.2f}")
         kpi_cols[0].metric(f"Moyenne de {metric_col}", f"{mean_metric:,.2f}")
 
     # KPI 2: Comptage d'éléments uniques
     if dimension_col:
-        unique_count = df[dimension_col].nunique()
+        unique_count = cached_view(df, 'kpi_distinct', (dimension_col,), lambda: df[dimension_col].nunique())
         kpi_cols[1].metric(f"Nombre de '{dimension_col}' uniques", f"{unique_count:,}")
 
     # KPI 3 & Graphique: Analyse temporelle
     if date_col and metric_col:
         try:
-            # Copie pour éviter SettingWithCopyWarning
-            temp_df = df[[date_col, metric_col]].copy()
-            # Conversion de la colonne date en datetime
-            temp_df[date_col] = pd.to_datetime(temp_df[date_col])
-            temp_df = temp_df.sort_values(by=date_col).set_index(date_col)
-            
-            # Calcul de tendance (comparaison 2e moitié vs 1re moitié)
-            mid_point = len(temp_df) // 2
-            first_half_sum = temp_df[metric_col].iloc[:mid_point].sum()
-            second_half_sum = temp_df[metric_col].iloc[mid_point:].sum()
+            rollups = cached_view(df, 'kpi_rollups', (date_col, metric_col),
+                                  lambda: _kpi_rollups(df, date_col, metric_col))
+            if not rollups:
+                raise ValueError("aucune date valide")
+
+            # Calcul de tendance (comparaison 2e moitié vs 1re moitié des lignes), à la journée près
+            first_half_sum, second_half_sum = half_trend(rollups['jour'])
             
             delta = 0
             if first_half_sum > 0:
@@ -97,15 +155,16 @@ def create_kpi_dashboard(df, numeric_cols, all_cols):
                 f"{delta:.2f}% vs 1re moitié"
             )
 
-            # Graphique d'évolution temporelle
+            # Graphique d'évolution temporelle, à la granularité la plus fine lisible sur la période
             st.markdown(f"#### Évolution de **{metric_col}** dans le temps")
-            resampled_df = temp_df.resample('D').sum().reset_index() # Agréger par jour
+            granularity = auto_granularity(rollups)
+            resampled_df = rollups[granularity]['somme'].rename(metric_col).rename_axis(date_col).reset_index()
             
             fig_time = px.area(
                 resampled_df,
                 x=date_col,
                 y=metric_col,
-                title=f"Performance de {metric_col} au fil du temps",
+                title=f"Performance de {metric_col} au fil du temps (par {granularity})",
                 labels={'x': 'Date', 'y': metric_col}
             )
             fig_time.update_layout(**PLOTLY_CONFIG['layout'])
@@ -116,14 +175,47 @@ def create_kpi_dashboard(df, numeric_cols, all_cols):
             
 # --- FONCTIONS DE VISUALISATION (Adaptées) ---
 
+def _overview_views(df):
+    """Figures de la vue d'ensemble, tirées du profil du jeu de données."""
+    profile = get_dataset_profile(df)
+    null_counts = profile.null_counts
+    views = {'fig_missing': None}
+    type_counts = profile.dtypes.astype(str).value_counts()
+    fig_types = px.pie(
+        values=type_counts.values,
+        names=type_counts.index,
+        title="Types de variables",
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Pastel
+    )
+    fig_types.update_layout(**PLOTLY_CONFIG['layout'], showlegend=False)
+    fig_types.update_traces(textinfo='percent+label', textposition='inside')
+    views['fig_types'] = fig_types
+    missing_data = null_counts[null_counts > 0].sort_values(ascending=False)
+    if not missing_data.empty:
+        fig_missing = px.bar(
+            x=missing_data.index,
+            y=(missing_data.values / len(df)) * 100,
+            title="Taux de Valeurs Manquantes (> 0%)",
+            labels={'x': 'Colonne', 'y': '% Manquant'},
+            color=missing_data.values,
+            color_continuous_scale='Reds'
+        )
+        fig_missing.update_layout(**PLOTLY_CONFIG['layout'])
+        views['fig_missing'] = fig_missing
+    return views
+
 def create_dashboard_overview(df):
     st.markdown("### 🔎 Vue d'Ensemble du Dataset")
     st.write("Cette section vous donne un résumé de haut niveau de vos données. Idéal pour un premier diagnostic.")
 
     # Section renommée : "Informations sur le Dataset"
     st.markdown("##### Informations sur le Dataset")
-    completeness = (1 - df.isnull().sum().sum() / df.size) * 100
-    duplicates = df.duplicated().sum()
+    # Profil partagé avec les recommandations et le rapport PDF : calculé une fois par jeu de données
+    profile = get_dataset_profile(df)
+    views = cached_view(df, 'overview', (), lambda: _overview_views(df))
+    completeness = profile.completeness
+    duplicates = profile.duplicates
     
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("📝 Lignes", f"{len(df):,}")
@@ -137,34 +229,12 @@ def create_dashboard_overview(df):
     with col1:
         # ...
         st.markdown("##### Répartition des Types de Données")
-        type_counts = df.dtypes.astype(str).value_counts()
-        fig_types = px.pie(
-            values=type_counts.values,
-            names=type_counts.index,
-            title="Types de variables",
-            hole=0.4,
-            color_discrete_sequence=px.colors.qualitative.Pastel
-        )
-        fig_types.update_layout(**PLOTLY_CONFIG['layout'], showlegend=False)
-        fig_types.update_traces(textinfo='percent+label', textposition='inside')
-        st.plotly_chart(fig_types, use_container_width=True)
+        st.plotly_chart(views['fig_types'], use_container_width=True)
     with col2:
         # ...
         st.markdown("##### Analyse des Valeurs Manquantes")
-        missing_data = df.isnull().sum()
-        missing_data = missing_data[missing_data > 0].sort_values(ascending=False)
-        
-        if not missing_data.empty:
-            fig_missing = px.bar(
-                x=missing_data.index,
-                y=(missing_data.values / len(df)) * 100,
-                title="Taux de Valeurs Manquantes (> 0%)",
-                labels={'x': 'Colonne', 'y': '% Manquant'},
-                color=missing_data.values,
-                color_continuous_scale='Reds'
-            )
-            fig_missing.update_layout(**PLOTLY_CONFIG['layout'])
-            st.plotly_chart(fig_missing, use_container_width=True)
+        if views['fig_missing'] is not None:
+            st.plotly_chart(views['fig_missing'], use_container_width=True)
         else:
             st.success("✅ Félicitations ! Aucune valeur manquante détectée.")
     with st.expander("💡 Insights et Recommandations"):
@@ -175,22 +245,58 @@ def create_dashboard_overview(df):
         st.success("🎯 **Prochaine Étape :** Explorez l'onglet 'Analyse Univariée' pour comprendre la distribution de chaque variable individuellement.")
 
 
+def _numeric_distribution(df, column, bin_width):
+    """
+    Histogramme et boîte à moustaches d'une colonne, calculés ici sur toutes les
+    lignes : seuls les effectifs et quelques points aberrants sont envoyés au
+    navigateur. Retourne la figure, les légendes à afficher et `describe()`.
+    """
+    values = finite_values(df[column])
+    counts, edges, widened = histogram_bins(values, bin_width)
+    box = box_summary(values)
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.05, row_heights=[0.8, 0.2])
+    fig.add_trace(go.Bar(x=edges[:-1], y=counts, width=np.diff(edges), offset=0, customdata=edges[1:],
+                         hovertemplate="[%{x:.4g} ; %{customdata:.4g}[<br>Effectif : %{y:,}<extra></extra>",
+                         name='Histogramme', marker_color='#2E86AB'), row=1, col=1)
+    if box is not None:
+        fig.add_trace(go.Box(q1=[box['q1']], median=[box['median']], q3=[box['q3']], mean=[box['mean']],
+                             lowerfence=[box['lowerfence']], upperfence=[box['upperfence']], y=[column],
+                             orientation='h', name='Box Plot', marker_color='#A23B72'), row=2, col=1)
+        fig.add_trace(go.Scatter(x=box['outliers'], y=[column] * len(box['outliers']), mode='markers',
+                                 name='Valeurs aberrantes', marker={'color': '#A23B72', 'size': 4}), row=2, col=1)
+    fig.update_layout(title_text=f"Distribution de {column}",**PLOTLY_CONFIG['layout'],showlegend=False,bargap=0)
+    captions = []
+    if widened:
+        captions.append(f"Largeur élargie à {edges[1] - edges[0]:.4g} pour ne pas dépasser {MAX_HISTOGRAM_BINS} classes.")
+    if box is not None and box['n_outliers'] > len(box['outliers']):
+        captions.append(f"{box['n_outliers']:,} valeurs aberrantes, dont {len(box['outliers']):,} représentées.")
+    return fig, captions, get_dataset_profile(df).describe.loc[[column]]
+
+def _category_frequencies(df, column):
+    """Diagramme des 20 catégories les plus fréquentes."""
+    value_counts = get_dataset_profile(df).value_counts[column].head(20)
+    fig_bar = px.bar(x=value_counts.index,y=value_counts.values,title=f"Top 20 des catégories pour {column}",labels={'x': column, 'y': 'Fréquence'},color=value_counts.values,color_continuous_scale='Cividis')
+    fig_bar.update_layout(**PLOTLY_CONFIG['layout'])
+    return fig_bar
+
 def create_univariate_analysis(df, numeric_cols, cat_cols):
-    # Cette fonction reste inchangée
     st.markdown("### 📊 Analyse Univariée (une variable à la fois)")
     st.write("Explorez ici chaque variable pour comprendre sa distribution, sa tendance centrale et sa dispersion.")
     st.markdown("#### Distribution des Variables Numériques")
     if not numeric_cols:
         st.warning("Aucune variable numérique détectée.")
     else:
-        selected_numeric = st.selectbox("Choisissez une variable numérique :", numeric_cols)
+        col_select, col_width = st.columns([2, 1])
+        selected_numeric = col_select.selectbox("Choisissez une variable numérique :", numeric_cols)
+        bin_width = col_width.number_input("Largeur des classes (0 = automatique) :", min_value=0.0, value=0.0,
+                                           help="Par défaut, règle de Freedman–Diaconis (2 × écart interquartile / n^⅓).")
         st.info("Regardez la forme de l'histogramme pour comprendre la distribution et le box plot pour identifier facilement la médiane et les potentiels outliers (points).")
-        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.05, row_heights=[0.8, 0.2])
-        fig.add_trace(go.Histogram(x=df[selected_numeric], name='Histogramme', marker_color='#2E86AB'), row=1, col=1)
-        fig.add_trace(go.Box(x=df[selected_numeric], name='Box Plot', marker_color='#A23B72'), row=2, col=1)
-        fig.update_layout(title_text=f"Distribution de {selected_numeric}",**PLOTLY_CONFIG['layout'],showlegend=False)
+        fig, captions, description = cached_view(df, 'distribution', (selected_numeric, bin_width),
+                                                 lambda: _numeric_distribution(df, selected_numeric, bin_width))
         st.plotly_chart(fig, use_container_width=True)
-        st.dataframe(df[selected_numeric].describe().to_frame().T, use_container_width=True)
+        for caption in captions:
+            st.caption(caption)
+        st.dataframe(description, use_container_width=True)
     st.divider()
     st.markdown("#### Distribution des Variables Catégorielles")
     if not cat_cols:
@@ -198,12 +304,88 @@ def create_univariate_analysis(df, numeric_cols, cat_cols):
     else:
         selected_cat = st.selectbox("Choisissez une variable catégorielle :", cat_cols)
         st.info("Ce graphique montre la fréquence de chaque catégorie. Idéal pour voir quelles sont les valeurs les plus communes.")
-        value_counts = df[selected_cat].value_counts().head(20)
-        fig_bar = px.bar(x=value_counts.index,y=value_counts.values,title=f"Top 20 des catégories pour {selected_cat}",labels={'x': selected_cat, 'y': 'Fréquence'},color=value_counts.values,color_continuous_scale='Cividis')
-        fig_bar.update_layout(**PLOTLY_CONFIG['layout'])
+        fig_bar = cached_view(df, 'frequencies', (selected_cat,), lambda: _category_frequencies(df, selected_cat))
         st.plotly_chart(fig_bar, use_container_width=True)
 
-def create_bivariate_analysis(df, numeric_cols, cat_cols):
+def _label_values(series):
+    """
+    Valeurs d'une colonne catégorielle en objets, manquants à NaN : le pd.NA des
+    chaînes 'string' ne se compare pas et fait échouer Plotly.
+    """
+    return series.to_numpy(dtype=object, na_value=np.nan)
+
+def _trendline_trace(x, y, name, color):
+    """Droite de tendance (moindres carrés) sur l'étendue des x, ou None si elle n'est pas définie."""
+    fit = linear_fit(x, y)
+    if fit is None:
+        return None
+    x_range = np.array([x.min(), x.max()])
+    return go.Scatter(x=x_range, y=fit['slope'] * x_range + fit['intercept'], mode='lines', name=name,
+                      line={'color': color, 'width': 2}, showlegend=False,
+                      hovertemplate=f"{name}<br>y = {fit['slope']:.4g}·x + {fit['intercept']:.4g}<br>"
+                                    f"R² = {fit['r2']:.3f}<extra></extra>")
+
+def create_scatter_figure(df, x_var, y_var, color_var=None):
+    """
+    Nuage de points adapté au volume (voir `backend.aggregation.scatter_mode`) :
+    SVG pour les petits nuages, WebGL ensuite, puis carte de densité calculée
+    ici pour les millions de points. Les droites de tendance sont ajustées par
+    moindres carrés sur toutes les lignes, une par catégorie colorée comme avec
+    `px.scatter(trendline="ols")`. Retourne la figure et le rendu utilisé.
+    """
+    x, y, valid = paired_finite_values(df[x_var], df[y_var])
+    mode = scatter_mode(len(x))
+    fig = go.Figure()
+    if mode == 'density':
+        counts, x_centers, y_centers = density_grid(x, y)
+        fig.add_trace(go.Heatmap(x=x_centers, y=y_centers, z=np.where(counts > 0, counts, np.nan),
+                                 colorscale='Viridis', colorbar={'title': 'Points'},
+                                 hovertemplate=f"{x_var} ≈ %{{x:.4g}}<br>{y_var} ≈ %{{y:.4g}}<br>Points : %{{z:,}}<extra></extra>"))
+        trend = _trendline_trace(x, y, 'Tendance', '#A23B72')
+        if trend is not None:
+            fig.add_trace(trend)
+    else:
+        trace_type = go.Scattergl if mode == 'webgl' else go.Scatter
+        if color_var is None:
+            groups = [(None, np.ones(len(x), dtype=bool))]
+        else:
+            # Les lignes sans catégorie rejoignent « Autres »
+            labels = pd.Series(_label_values(df[color_var])[valid])
+            top = labels.value_counts().index[:MAX_COLOR_GROUPS]
+            groups = [(label, labels.eq(label).to_numpy(dtype=bool)) for label in top]
+            others = ~labels.isin(top).to_numpy(dtype=bool)
+            if others.any():
+                groups.append(('Autres', others))
+        palette = px.colors.qualitative.Prism
+        for position, (label, mask) in enumerate(groups):
+            color = palette[position % len(palette)] if color_var is not None else '#2E86AB'
+            name = str(label) if label is not None else 'Points'
+            fig.add_trace(trace_type(x=x[mask], y=y[mask], mode='markers', name=name, legendgroup=name,
+                                     marker={'color': color, 'opacity': 0.7, 'size': 5}))
+            trend = _trendline_trace(x[mask], y[mask], f"Tendance {name}" if label is not None else 'Tendance',
+                                     color if color_var is not None else '#A23B72')
+            if trend is not None:
+                trend.legendgroup = name
+                fig.add_trace(trend)
+    fig.update_layout(template=PLOTLY_CONFIG['template'], title_text=f"Relation entre {x_var} et {y_var}",
+                      xaxis_title=x_var, yaxis_title=y_var, showlegend=color_var is not None and mode != 'density')
+    fig.update_layout(**PLOTLY_CONFIG['layout'])
+    return fig, mode
+
+def _correlation_figure(df, numeric_cols):
+    corr_matrix = get_dataset_profile(df).correlation.loc[numeric_cols, numeric_cols]
+    fig_corr = px.imshow(corr_matrix, text_auto=".2f", aspect="auto",color_continuous_scale='RdBu_r', range_color=[-1, 1],title="Matrice de Corrélation")
+    fig_corr.update_layout(**PLOTLY_CONFIG['layout'])
+    return fig_corr
+
+def _group_comparison(df, plot_df, numeric_var, cat_var):
+    """Boîtes par groupe (sur `plot_df`, éventuellement un échantillon) et statistiques par groupe (sur `df`)."""
+    plot_df = pd.DataFrame({cat_var: _label_values(plot_df[cat_var]), numeric_var: plot_df[numeric_var]})
+    fig_box = px.box(plot_df, x=cat_var, y=numeric_var, color=cat_var,title=f"Distribution de {numeric_var} par {cat_var}",color_discrete_sequence=px.colors.qualitative.Prism)
+    fig_box.update_layout(**PLOTLY_CONFIG['layout'])
+    return fig_box, df.groupby(cat_var, observed=True)[numeric_var].describe()
+
+def create_bivariate_analysis(df, numeric_cols, cat_cols, sample_df=None):
     # Cette fonction reste inchangée
     st.markdown("### 🔗 Analyse Bivariée (relations entre deux variables)")
     st.write("Comment vos variables interagissent-elles ? C'est ici que vous pouvez découvrir des relations cachées.")
@@ -214,9 +396,7 @@ def create_bivariate_analysis(df, numeric_cols, cat_cols):
             return
         st.markdown("#### Matrice de Corrélation")
         st.info("Cette carte de chaleur montre la force de la relation linéaire entre les variables. Bleu = corrélation positive, Rouge = corrélation négative. Proche de 1 ou -1 indique une forte relation.")
-        corr_matrix = df[numeric_cols].corr()
-        fig_corr = px.imshow(corr_matrix, text_auto=".2f", aspect="auto",color_continuous_scale='RdBu_r', range_color=[-1, 1],title="Matrice de Corrélation")
-        fig_corr.update_layout(**PLOTLY_CONFIG['layout'])
+        fig_corr = cached_view(df, 'correlation', tuple(numeric_cols), lambda: _correlation_figure(df, numeric_cols))
         st.plotly_chart(fig_corr, use_container_width=True)
         st.markdown("#### Exploration de la Relation")
         col1, col2, col3 = st.columns(3)
@@ -224,10 +404,14 @@ def create_bivariate_analysis(df, numeric_cols, cat_cols):
         y_var = col2.selectbox("Variable Y :", numeric_cols, index=min(1, len(numeric_cols)-1), key="scatter_y")
         color_var = col3.selectbox("Colorer par (optionnel) :", [None] + cat_cols, key="scatter_color")
         if x_var != y_var:
-            fig_scatter = px.scatter(df, x=x_var, y=y_var, color=color_var,trendline="ols",title=f"Relation entre {x_var} et {y_var}",color_continuous_scale='Viridis')
-            fig_scatter.update_layout(**PLOTLY_CONFIG['layout'])
+            # Toutes les lignes : au-delà du seuil, le nuage devient une carte de densité de taille fixe
+            fig_scatter, scatter_render, correlation = cached_view(
+                df, 'scatter', (x_var, y_var, color_var),
+                lambda: (*create_scatter_figure(df, x_var, y_var, color_var), df[x_var].corr(df[y_var])))
             st.plotly_chart(fig_scatter, use_container_width=True)
-            correlation = df[x_var].corr(df[y_var])
+            if scatter_render == 'density':
+                st.caption("Nuage trop dense pour être tracé point par point : chaque case indique le nombre de points"
+                           + (" (la couleur par catégorie n'est pas représentée)." if color_var else "."))
             st.metric("Coefficient de corrélation (Pearson)", f"{correlation:.3f}")
     elif analysis_type == "Numérique vs Catégorielle (Comparaison)":
         if not numeric_cols or not cat_cols:
@@ -239,11 +423,14 @@ def create_bivariate_analysis(df, numeric_cols, cat_cols):
         numeric_var = col1.selectbox("Variable numérique à comparer :", numeric_cols, key="comp_num")
         cat_var = col2.selectbox("Variable catégorielle pour grouper :", cat_cols, key="comp_cat")
         if numeric_var and cat_var:
-            fig_box = px.box(df, x=cat_var, y=numeric_var, color=cat_var,title=f"Distribution de {numeric_var} par {cat_var}",color_discrete_sequence=px.colors.qualitative.Prism)
-            fig_box.update_layout(**PLOTLY_CONFIG['layout'])
+            plot_df = df if sample_df is None else sample_df
+            # L'échantillon est tiré avec une graine fixe : il suffit de savoir s'il est utilisé
+            fig_box, group_stats = cached_view(df, 'comparison', (numeric_var, cat_var, sample_df is not None),
+                                               lambda: _group_comparison(df, plot_df, numeric_var, cat_var))
             st.plotly_chart(fig_box, use_container_width=True)
+            show_sample_notice(sample_df, df)
             st.markdown("##### Statistiques par groupe")
-            st.dataframe(df.groupby(cat_var)[numeric_var].describe(), use_container_width=True)
+            st.dataframe(group_stats, use_container_width=True)
 
 # --- FONCTION PRINCIPALE DE L'APPLICATION (Adaptée) ---
 
@@ -255,14 +442,24 @@ def create_visualizations(df):
 
     st.header("Dashboard d'Analyse Exploratoire des Données", divider='rainbow')
 
-    for col in df.select_dtypes(include='object').columns:
-        if df[col].nunique() / len(df) < 0.1 and df[col].nunique() < 50:
-            df[col] = df[col].astype('category')
-            
     numeric_columns = get_numeric_columns(df)
     categorical_columns = get_categorical_columns(df)
     all_columns = df.columns.tolist() # Pour le sélecteur de date
 
+    # Mode échantillon : seules les boîtes de la comparaison par groupe utilisent un échantillon aléatoire,
+    # les autres vues agrègent toutes les lignes
+    sample_df = None
+    if len(df) > DEFAULT_SAMPLE_ROWS:
+        full_data = st.checkbox(
+            FULL_DATA_LABEL,
+            value=False,
+            help=f"Au-delà de {DEFAULT_SAMPLE_ROWS:,} lignes, les boîtes à moustaches de la comparaison par groupe "
+                 "(onglet Analyse Bivariée) sont tracées sur un échantillon aléatoire ; les autres graphiques "
+                 "utilisent déjà toutes les lignes. Cochez pour tracer ces boîtes sur toutes les lignes (plus lent)."
+        )
+        if not full_data:
+            sample_df = get_view_sample(df)
+
     # Nouvelle structure avec l'onglet KPI
     tab1, tab2, tab3, tab4 = st.tabs(["⭐ KPIs", "🔎 Vue d'Ensemble", "📊 Analyse Univariée", "🔗 Analyse Bivariée"])
 
@@ -276,4 +473,4 @@ def create_visualizations(df):
         create_univariate_analysis(df, numeric_columns, categorical_columns)
         
     with tab4:
-        create_bivariate_analysis(df, numeric_columns, categorical_columns)
\ No newline at end of file
+        create_bivariate_analysis(df, numeric_columns, categorical_columns, sample_df)
\ No newline at end of file